@@ -1,13 +1,25 @@
 from project_config import (
-    SPLIT_DATA_FOLDER,
-    TEMP_FOLDER,
-    ARCHIVE_FOLDER,
-    MAX_FILE_LINE,
+    MAPPER,
+    QUERY_MEMORY_BUDGET,
+    QUERY_WORKERS,
     RESULTS_FOLDER
 )
-from typing import List, Dict, Tuple, Set, Union
+from typing import Callable, List, Dict, Tuple, Set, Union
+from column_store import minutes_to_dates, scan_positions, scan_range
+from position_store import PositionStore
+from process_pool import map_tasks
+from monthly_summary import cell_key
+from tracing import TRACER
 import os
 import csv
+import tempfile
+import numpy as np
+
+# whether each of the min temperature, max temperature, min humidity and
+# max humidity stats is a minimum
+STATS_IS_MIN = (True, False, True, False)
+# header line of every result csv
+RESULT_COLUMNS = ['Date', 'Station', 'Category', 'Value']
 
 
 class Processor:
@@ -15,271 +27,454 @@ class Processor:
         self,
         required_years: int,
         location: str,
-        zone_maps: Dict[str, List[Tuple[int, int]]]
+        zone_maps: Dict[str, List[Tuple[int, int]]],
+        workers: int = QUERY_WORKERS,
+        memory_budget: int = QUERY_MEMORY_BUDGET,
+        queries: List[Tuple[int, str]] = None,
+        stations: Dict[str, str] = None
     ) -> None:
         self.required_years = required_years
         self.location = location
+        # (required years, location) of every query answered by one shared scan
+        self.queries = queries if queries is not None else [(required_years, location)]
         self.zone_maps = zone_maps
+        self.workers = workers
+        self.memory_budget = memory_budget
+        # code of every station name, and the other way round
+        self.station_dictionary = MAPPER['Station'] if stations is None else stations
+        self.station_names = {
+            code: name for name, code in self.station_dictionary.items()
+        }
+        # (zone, start_row, end_row) pieces of every required (location, year, month)
+        self.month_ranges = {}
+        # row ids that survived the location stage, per (location, year, month)
+        self.positions = PositionStore(memory_budget=memory_budget)
+        # stats and dates of every (location, year, month) with readings
+        self.month_stats = {}
+        self.directory = self.build_directory()
+        # Timestamp zone map entries by zone, as the column scans take them
+        self.timestamp_zones = dict(enumerate(zone_maps['Timestamp']))
 
+    @TRACER.traced('process_month_and_year')
     def process_month_and_year(self) -> None:
-        """Filters through timestamps and stores the indexes"""
-        years = [year for year in range(2002, 2022)
-                 if year % 10 == self.required_years]
+        """Looks up the row ranges of every required month in the directory"""
+        years = [year for year in range(2002, 2022) if self.year_locations(year=year)]
+        found_years = {year for _, year, _ in self.directory}
         for year in years:
-            dt_to_check = f'{year}-01-01 00:00'
-            zone = self.find_zone(dt_to_check=dt_to_check)
-            if zone == -1:
+            if year not in found_years:
                 print('Error, could not find date')
-                return
-            opened_files = [open(f'{TEMP_FOLDER}/Timestamp_{year}_{i}.txt', 'w')
-                            for i in range(1, 13)]
-            self.write_to_file_from_zone(
-                zone=zone,
-                year=year,
-                opened_files=opened_files,
-                dt_to_check=dt_to_check
+            for location in self.year_locations(year=year):
+                for month in range(1, 13):
+                    key = (location, year, month)
+                    if key in self.directory:
+                        self.month_ranges[key] = self.directory[key]
+        if TRACER.enabled:
+            timestamp_zones = self.zone_maps['Timestamp']
+            TRACER.count(
+                zones_considered=len(timestamp_zones),
+                zones_pruned=len(timestamp_zones) - len(self.range_zones()),
+                rows_in=timestamp_zones[-1]['max_idx'] + 1 if timestamp_zones else 0,
+                rows_out=self.range_rows()
             )
         return
 
-    def write_to_file_from_zone(
-        self,
-        zone: int,
-        year: int,
-        opened_files: List,
-        dt_to_check: str = None,
-    ) -> None:
-        """After finding the correct zone, get correct timestamps and write to file"""
-        if not self.zone_maps:
-            return
-        if zone >= len(list(self.zone_maps.values())[0]):
-            return
-        with open(f'{SPLIT_DATA_FOLDER}/Timestamp_{zone}.txt', 'r') as f:
-            lines = f.read().splitlines()
-        lowest_idx = 0
-        if dt_to_check:
-            lowest_idx = self.binary_search(
-                dt_to_check=dt_to_check,
-                lines=lines
-            )
-        jump = MAX_FILE_LINE * zone
-        for idx in range(lowest_idx, len(lines)):
-            line = lines[idx]
-            if int(line[:4]) != year:
-                break
-            month = int(line[5:7])
-            opened_files[month - 1].write(f'{line.split()[0]} {jump + idx}\n')
-        else:
-            self.write_to_file_from_zone(
-                zone=zone + 1,
-                year=year,
-                opened_files=opened_files
-            )
-        for file in opened_files:
-            file.close()
-        return
+    def range_zones(self) -> Set[int]:
+        """Lists the zones the month ranges left to narrow down are in"""
+        return {zone for pieces in self.month_ranges.values() for zone, _, _ in pieces}
+
+    def range_rows(self) -> int:
+        """Counts the rows within the month ranges left to narrow down"""
+        return sum(
+            end_row - start_row
+            for pieces in self.month_ranges.values()
+            for _, start_row, end_row in pieces
+        )
 
-    def find_zone(self, dt_to_check: str) -> int:
-        """Compares the range of each zone map and finds the zone the date is in"""
+    def build_directory(self) -> Dict[Tuple[str, int, int], List[Tuple[int, int, int]]]:
+        """
+        Collects the month ranges each Timestamp zone recorded at ingest into a
+        (location, year, month) -> [(zone, start_row, end_row)] directory
+        """
+        directory = {}
         for zone, min_max_dict in enumerate(self.zone_maps['Timestamp']):
-            min_date = min_max_dict['min_date']
-            max_date = min_max_dict['max_date']
-            if min_date <= dt_to_check <= max_date:
-                return zone
-        return -1
+            for location, months in min_max_dict['months'].items():
+                for key, (start_row, end_row) in months.items():
+                    directory.setdefault(
+                        (location, int(key[:4]), int(key[5:7])),
+                        []
+                    ).append((zone, start_row, end_row))
+        return directory
+
+    def year_locations(self, year: int) -> List[str]:
+        """Lists the locations queried for a year"""
+        return sorted({
+            location for required_years, location in self.queries
+            if year % 10 == required_years
+        })
 
+    @TRACER.traced('process_location')
     def process_location(self) -> None:
-        """Stores positions with correct location"""
-        current_files = ['/'.join([TEMP_FOLDER, f])
-                         for f in os.listdir(TEMP_FOLDER)]
-        for file in current_files:
-            filename = file.split('/')[-1]
-            underscore_idx = filename.find('_')
-            col = filename[:underscore_idx]
-            remainder = filename[underscore_idx + 1:]
-            if col != 'Timestamp':
-                continue
-            # will read in a list of indexes
-            station_file = f'{TEMP_FOLDER}/Station_{remainder}'
-            with open(file, 'r') as f1, open(station_file, 'a') as f2:
-                timestamp_data = f1.read().splitlines()
-                timestamp_data = list(map(self.split_timestamp, timestamp_data))
-                starting_idx = timestamp_data[0][1]
-                ending_idx = timestamp_data[-1][1]
-                for zone, min_max_dict in enumerate(self.zone_maps['Station']):
-                    min_idx = min_max_dict['min_idx']
-                    max_idx = min_max_dict['max_idx']
-                    # if no overlap between zone and indexes, skip to next file
-                    if starting_idx > max_idx:
-                        continue
-                    # if exceeded, break
-                    if ending_idx < min_idx:
-                        break
-                    with open(f'{SPLIT_DATA_FOLDER}/Station_{zone}.txt', 'r') as f:
-                        station_data = f.read().splitlines()
-                    for timestamp_date, timestamp_idx in timestamp_data:
-                        if timestamp_idx not in range(min_idx, max_idx + 1):
-                            continue
-                        if station_data[timestamp_idx - min_idx] == self.location:
-                            f2.write(f'{timestamp_date} {timestamp_idx}\n')
-        # move timestamp temp file to archive
-        folder = f'{ARCHIVE_FOLDER}/Timestamp'
-        if not os.path.exists(folder):
-            os.makedirs(folder)
-        for file in current_files:
-            filename = file.split('/')[-1]
-            new_file_path = f'{folder}/{filename}'
-            os.rename(file, new_file_path)
+        """
+        Narrows the row ranges of each month down to the rows of each location.
+        Ranges in clustered zones hold a single location and are taken as they
+        are, other zones are read once for all the locations and months they are
+        filtered by.
+        """
+        chunks, zone_ranges = {}, {}
+        if TRACER.enabled:
+            # each month is narrowed down zone by zone
+            TRACER.count(
+                zones_considered=sum(map(len, self.month_ranges.values())),
+                rows_in=self.range_rows()
+            )
+        for (location, year, month), pieces in sorted(self.month_ranges.items()):
+            for zone, start_row, end_row in pieces:
+                if self.zone_maps['Station'][zone]['clustered']:
+                    TRACER.count(zones_pruned=1)
+                    chunks.setdefault((location, year, month), []).append(
+                        (zone, np.arange(start_row, end_row, dtype=np.int64))
+                    )
+                    continue
+                zone_ranges.setdefault(zone, {})[(location, year, month)] = (
+                    start_row,
+                    end_row
+                )
+        # tasks only carry the zone map entry they need, not the processor
+        results = self.run_tasks(
+            func=filter_location,
+            tasks=[
+                (zone, self.zone_maps['Station'][zone], key_ranges)
+                for zone, key_ranges in sorted(zone_ranges.items())
+            ]
+        )
+        for (zone, _), key_positions in zip(sorted(zone_ranges.items()), results):
+            for key, positions in key_positions.items():
+                chunks.setdefault(key, []).append((zone, positions))
+        for key in sorted(self.month_ranges):
+            zone_chunks = sorted(chunks.get(key, []), key=lambda chunk: chunk[0])
+            positions = np.concatenate([
+                positions for _, positions in zone_chunks
+            ]) if zone_chunks else []
+            TRACER.count(rows_out=len(positions))
+            self.positions.put(key=key, positions=positions)
+        self.month_ranges = {}
         return
 
+    @TRACER.traced('process_temperature_and_humidity')
     def process_temperature_and_humidity(self, matric_num) -> None:
-        file_name = f'ScanResult_{matric_num}.csv'
-        current_files = ['/'.join([TEMP_FOLDER, f]) for f in os.listdir(TEMP_FOLDER)]
-        for file in current_files:
-            min_temp, min_temp_dates = float('inf'), set()
-            max_temp, max_temp_dates = float('-inf'), set()
-            min_humidity, min_humidity_dates = float('inf'), set()
-            max_humidity, max_humidity_dates = float('-inf'), set()
-            with open(file, 'r') as f1:
-                station_data = f1.read().splitlines()
-                # Skip to next intermediate file if current file is empty
-                if not station_data:
+        self.aggregate_months()
+        self.write_query_results(
+            matric_num=matric_num,
+            required_years=self.required_years,
+            location=self.location
+        )
+        return
+
+    @TRACER.traced('aggregate_months')
+    def aggregate_months(self) -> None:
+        """Finds the stats of every (location, year, month), reading each zone once"""
+        zone_positions = {}
+        for key in self.positions.keys():
+            TRACER.count(rows_in=len(self.positions.get(key=key)))
+            for zone, positions in self.split_by_zone(
+                col='Temperature',
+                positions=self.positions.get(key=key),
+                can_match=self.has_readings
+            ):
+                zone_positions.setdefault(zone, {})[key] = positions
+        results = self.run_tasks(
+            func=aggregate_zone,
+            tasks=[
+                (zone, self.zone_maps['Temperature'][zone], key_positions)
+                for zone, key_positions in sorted(zone_positions.items())
+            ]
+        )
+        month_stats = {}
+        for zone_stats in results:
+            for key, stats in zone_stats.items():
+                if key not in month_stats:
+                    month_stats[key] = stats
                     continue
-                station_data = list(map(self.split_timestamp, station_data))
-                starting_idx = station_data[0][1]
-                ending_idx = station_data[-1][1]
-                for zone, min_max_dict in enumerate(self.zone_maps['Temperature']):
-                    min_idx = min_max_dict['min_idx']
-                    max_idx = min_max_dict['max_idx']
-                    if starting_idx > max_idx:
-                        continue
-                    if ending_idx < min_idx:
-                        break
-                    with open(f'{SPLIT_DATA_FOLDER}/Temperature_{zone}.txt', 'r') as f:
-                        temperature_data = list(
-                            map(self.convert_to_float, f.read().splitlines())
-                        )
-                    with open(f'{SPLIT_DATA_FOLDER}/Humidity_{zone}.txt', 'r') as f:
-                        humidity_data = list(
-                            map(self.convert_to_float, f.read().splitlines())
-                        )
+                # merge step, combines the stats of the zones a month spans
+                month_stats[key] = merge_all_stats(
+                    stats=month_stats[key],
+                    other=stats
+                )
+        self.month_stats = {
+            key: [
+                [stat, self.row_dates(row_ids=row_ids)]
+                for stat, row_ids in stats
+            ]
+            for key, stats in month_stats.items()
+        }
+        TRACER.count(rows_out=len(self.month_stats))
+        self.positions.clear()
+        return
 
-                    for station_date, station_idx in station_data:
-                        if station_idx not in range(min_idx, max_idx + 1):
-                            continue
-                        current_temp = temperature_data[station_idx - min_idx]
-                        current_humidity = humidity_data[station_idx - min_idx]
-                        min_temp, min_temp_dates = self.compare_stats(
-                            current_date=station_date,
-                            current_stat=current_temp,
-                            stat_to_change=min_temp,
-                            date_set=min_temp_dates,
-                            is_min=True
-                        )
-                        max_temp, max_temp_dates = self.compare_stats(
-                            current_date=station_date,
-                            current_stat=current_temp,
-                            stat_to_change=max_temp,
-                            date_set=max_temp_dates,
-                            is_min=False
-                        )
-                        min_humidity, min_humidity_dates = self.compare_stats(
-                            current_date=station_date,
-                            current_stat=current_humidity,
-                            stat_to_change=min_humidity,
-                            date_set=min_humidity_dates,
-                            is_min=True
-                        )
-                        max_humidity, max_humidity_dates = self.compare_stats(
-                            current_date=station_date,
-                            current_stat=current_humidity,
-                            stat_to_change=max_humidity,
-                            date_set=max_humidity_dates,
-                            is_min=False
-                        )
-            self.write_results(
-                file_name=file_name,
-                min_temp_stats=[min_temp, min_temp_dates],
-                max_temp_stats=[max_temp, max_temp_dates],
-                min_humidity_stats=[min_humidity, min_humidity_dates],
-                max_humidity_stats=[max_humidity, max_humidity_dates]
-            )
+    @TRACER.traced('summarize_months')
+    def summarize_months(self, summary: Dict[str, Dict]) -> None:
+        """
+        Takes the stats of every required (location, year, month) from the
+        monthly summary built at ingest, instead of scanning the columns
+        """
+        self.month_stats = {}
+        for location, year, month in sorted(self.month_ranges):
+            cell = summary.get(cell_key(location=location, year=year, month=month))
+            if cell is None:
+                continue
+            stats = []
+            for col in ('Temperature', 'Humidity'):
+                for stat, missing in (('min', float('inf')), ('max', float('-inf'))):
+                    value = cell[col][stat]
+                    value = missing if value is None else np.float32(value)
+                    stats.append([value, set(cell[col][f'{stat}_dates'])])
+            self.month_stats[(location, year, month)] = stats
+        TRACER.count(rows_in=len(self.month_ranges), rows_out=len(self.month_stats))
+        self.month_ranges = {}
         return
 
-    def write_results(
+    @TRACER.traced('write_query_results')
+    def write_query_results(
+        self,
+        matric_num: str,
+        required_years: int,
+        location: str
+    ) -> None:
+        """Writes the monthly stats a query asks for to its result csv"""
+        rows = self.query_rows(required_years=required_years, location=location)
+        self.write_results(file_name=f'ScanResult_{matric_num}.csv', rows=rows)
+        return
+
+    def query_rows(self, required_years: int, location: str) -> List[List[str]]:
+        """Lists the result csv rows of the monthly stats a query asks for"""
+        rows = []
+        for key in sorted(self.month_stats):
+            key_location, year, _ = key
+            if key_location != location or year % 10 != required_years:
+                continue
+            min_temp_stats, max_temp_stats, min_humidity_stats, max_humidity_stats = (
+                self.month_stats[key]
+            )
+            rows.extend(self.result_rows(
+                min_temp_stats=min_temp_stats,
+                max_temp_stats=max_temp_stats,
+                min_humidity_stats=min_humidity_stats,
+                max_humidity_stats=max_humidity_stats,
+                location=location
+            ))
+        return rows
+
+    def row_dates(self, row_ids: Set[int]) -> Set[str]:
+        """Reads the dates of a few indexes, only done for the final results"""
+        dates = set()
+        for _, timestamps in scan_positions(
+            col='Timestamp',
+            zones=self.timestamp_zones,
+            positions=np.array(sorted(row_ids), dtype=np.int64)
+        ):
+            dates.update(minutes_to_dates(timestamps))
+        return dates
+
+    def has_readings(self, zone: int) -> bool:
+        """Checks with the zone maps if a zone holds any temperature or humidity"""
+        return any(
+            self.has_values(col=col, zone=zone)
+            for col in ('Temperature', 'Humidity')
+        )
+
+    def has_values(
+        self,
+        col: str,
+        zone: int,
+        lower: float = float('-inf'),
+        upper: float = float('inf')
+    ) -> bool:
+        """Checks with the zone map if a zone can hold readings within [lower, upper]"""
+        min_max_dict = self.zone_maps[col][zone]
+        # every reading of the zone is missing
+        if min_max_dict['min_value'] is None:
+            return False
+        return min_max_dict['max_value'] >= lower and min_max_dict['min_value'] <= upper
+
+    def split_by_zone(
+        self,
+        col: str,
+        positions: np.ndarray,
+        can_match: Callable[[int], bool] = None
+    ) -> List[Tuple[int, np.ndarray]]:
+        """
+        Splits sorted indexes into the chunks that fall in each zone of col,
+        leaving out zones that can_match rules out without opening them
+        """
+        chunks = []
+        if not len(positions):
+            return chunks
+        for zone, min_max_dict in enumerate(self.zone_maps[col]):
+            min_idx = min_max_dict['min_idx']
+            max_idx = min_max_dict['max_idx']
+            # if no overlap between zone and indexes, skip to next zone
+            if positions[0] > max_idx:
+                continue
+            # if exceeded, break
+            if positions[-1] < min_idx:
+                break
+            TRACER.count(zones_considered=1)
+            if can_match is not None and not can_match(zone):
+                TRACER.count(zones_pruned=1)
+                continue
+            lowest = np.searchsorted(positions, min_idx, side='left')
+            highest = np.searchsorted(positions, max_idx, side='right')
+            if lowest < highest:
+                chunks.append((zone, np.asarray(positions[lowest:highest])))
+        return chunks
+
+    def run_tasks(self, func: Callable, tasks: List) -> List:
+        return map_tasks(func=func, tasks=tasks, workers=self.workers)
+
+    def result_rows(
         self,
-        file_name: str,
         min_temp_stats: List[Union[float, Set]],
         max_temp_stats: List[Union[float, Set]],
         min_humidity_stats: List[Union[float, Set]],
         max_humidity_stats: List[Union[float, Set]],
-    ) -> None:
-        if not os.path.exists(RESULTS_FOLDER):
-            os.makedirs(RESULTS_FOLDER)
-        station = 'Paya Lebar' if self.location == '1' else 'Changi'
+        location: str = None
+    ) -> List[List[str]]:
+        """Lists the result csv rows of the stats of one month"""
+        location = self.location if location is None else location
+        station = self.station_names[location]
         stats_and_categories = [
             (min_temp_stats, 'Min Temperature'),
             (max_temp_stats, 'Max Temperature'),
             (min_humidity_stats, 'Min Humidity'),
             (max_humidity_stats, 'Max Humidity')
         ]
-        file_name = f'{RESULTS_FOLDER}/{file_name}'
-        file_exists = os.path.isfile(file_name)
-        with open(file_name, 'a', newline='') as csv_file:
-            csv_writer = csv.writer(csv_file, delimiter=',')
-            if not file_exists:
-                col_name = ['Date', 'Station', 'Category', 'Value']
-                csv_writer.writerow(col_name)  # write col name
-            for (stat, dates), category in stats_and_categories:
-                for date in dates:
-                    line = [date, station, category, str(stat)]
-                    csv_writer.writerow(line)
+        return [
+            [date, station, category, str(stat)]
+            for (stat, dates), category in stats_and_categories
+            for date in sorted(dates)
+        ]
+
+    def write_results(self, file_name: str, rows: List[List[str]]) -> None:
+        """
+        Writes a result csv through a temporary file renamed over it, so a
+        rerun replaces the previous result and readers never see half of it
+        """
+        os.makedirs(RESULTS_FOLDER, exist_ok=True)
+        fd, temp_file = tempfile.mkstemp(
+            dir=RESULTS_FOLDER,
+            prefix=f'.{file_name}.',
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'w', newline='') as csv_file:
+                csv_writer = csv.writer(csv_file, delimiter=',')
+                csv_writer.writerow(RESULT_COLUMNS)  # write col name
+                csv_writer.writerows(rows)
+            # mkstemp only lets the owner read the file
+            os.chmod(temp_file, 0o644)
+            os.replace(temp_file, f'{RESULTS_FOLDER}/{file_name}')
+        except BaseException:
+            os.remove(temp_file)
+            raise
+        TRACER.count(files_written=1, rows_out=len(rows))
         return
 
-    def compare_stats(
-        self,
-        current_date: str,
-        current_stat: float,
-        stat_to_change: float,
-        date_set: Set,
-        is_min: bool
-    ) -> Tuple[float, Set]:
-        if is_min:
-            if current_stat != 'M':
-                if current_stat < stat_to_change:
-                    stat_to_change = current_stat
-                    date_set = set([current_date])
-                elif current_stat == stat_to_change:
-                    date_set.add(current_date)
-        else:
-            if current_stat != 'M':
-                if current_stat > stat_to_change:
-                    stat_to_change = current_stat
-                    date_set = set([current_date])
-                elif current_stat == stat_to_change:
-                    date_set.add(current_date)
-        return stat_to_change, date_set
 
-    def binary_search(self, dt_to_check: str, lines: List[str]) -> int:
-        """Binary search to find smallest position of record in current month"""
-        left, right = 0, len(lines) - 1
-        while left <= right:
-            mid = (left + right) // 2
-            mid_value = lines[mid]
-            if mid_value == dt_to_check:
-                return mid
-            if mid_value < dt_to_check:
-                left = mid + 1
-            else:
-                right = mid - 1
-        return left
+def filter_location(
+    task: Tuple[int, Dict, Dict[Tuple[str, int, int], Tuple[int, int]]]
+) -> Dict[Tuple[str, int, int], np.ndarray]:
+    """
+    Keeps the rows of the location of each (location, year, month) within its
+    [start_row, end_row) of a zone, scanning the zone through the column cache
+    """
+    zone, min_max_dict, key_ranges = task
+    zone_rows = min_max_dict['max_idx'] - min_max_dict['min_idx'] + 1
+    key_positions = {}
+    for key, (start_row, end_row) in key_ranges.items():
+        location = key[0]
+        # every row of the zone is at the location, no need to read it
+        if min_max_dict['stations'].get(location, 0) == zone_rows:
+            TRACER.count(zones_pruned=1)
+            key_positions[key] = np.arange(start_row, end_row, dtype=np.int64)
+            continue
+        key_positions[key] = np.concatenate([np.empty(0, dtype=np.int64), *(
+            row_ids[codes == int(location)]
+            for row_ids, codes in scan_range(
+                col='Station',
+                zones={zone: min_max_dict},
+                start_row=start_row,
+                end_row=end_row
+            )
+        )])
+    return key_positions
+
+
+def aggregate_zone(
+    task: Tuple[int, Dict, Dict[Tuple, np.ndarray]]
+) -> Dict[Tuple, List[List[Union[float, Set]]]]:
+    """Finds the stats of every group of indexes in one zone, a batch at a time"""
+    zone, min_max_dict, key_positions = task
+    # every column of a zone holds the same rows
+    zones = {zone: min_max_dict}
+    zone_stats = {}
+    for key, positions in key_positions.items():
+        for (row_ids, temperature_data), (_, humidity_data) in zip(
+            scan_positions(col='Temperature', zones=zones, positions=positions),
+            scan_positions(col='Humidity', zones=zones, positions=positions)
+        ):
+            stats = compute_stats(
+                positions=row_ids,
+                temperature_data=temperature_data,
+                humidity_data=humidity_data
+            )
+            if key in zone_stats:
+                stats = merge_all_stats(stats=zone_stats[key], other=stats)
+            zone_stats[key] = stats
+    return zone_stats
+
+
+def compute_stats(
+    positions: np.ndarray,
+    temperature_data: np.ndarray,
+    humidity_data: np.ndarray
+) -> List[List[Union[float, Set]]]:
+    """
+    Finds the min and max temperature and humidity of some indexes,
+    along with the set of indexes each of them is found at
+    """
+    stats = []
+    for values in (temperature_data, humidity_data):
+        # missing readings are NaN and never a min or max
+        present = ~np.isnan(values)
+        if not present.any():
+            stats.extend([[float('inf'), set()], [float('-inf'), set()]])
+            continue
+        for stat in (values[present].min(), values[present].max()):
+            stats.append([stat, set(positions[values == stat].tolist())])
+    return stats
+
+
+def merge_all_stats(
+    stats: List[List[Union[float, Set]]],
+    other: List[List[Union[float, Set]]]
+) -> List[List[Union[float, Set]]]:
+    """Combines two partial results of all four stats"""
+    return [
+        merge_stats(stats=stat, other=other_stat, is_min=is_min)
+        for stat, other_stat, is_min in zip(stats, other, STATS_IS_MIN)
+    ]
 
-    def convert_to_float(self, s: str) -> Union[str, float]:
-        try:
-            return float(s)
-        except ValueError:
-            return s
 
-    def split_timestamp(self, s: str) -> List[Union[str, int]]:
-        date_and_idx = s.rstrip().split()
-        date_and_idx[1] = int(date_and_idx[1])
-        return date_and_idx
+def merge_stats(
+    stats: List[Union[float, Set]],
+    other: List[Union[float, Set]],
+    is_min: bool
+) -> List[Union[float, Set]]:
+    """Combines two partial results of the same min or max"""
+    stat, date_set = stats
+    other_stat, other_date_set = other
+    if stat == other_stat:
+        return [stat, date_set | other_date_set]
+    if (other_stat < stat) == is_min:
+        return other
+    return stats
@@ -0,0 +1,272 @@
+from project_config import QUERY_WORKERS, VALUE_ZONE_MAP_COLS
+from typing import Dict, List, Tuple, Union
+from column_store import group_rows, read_column, reduce_runs, to_minutes
+from Processor import Processor
+from tracing import TRACER
+import numpy as np
+
+# numpy datetime unit that each group by granularity truncates timestamps to
+GROUP_BY_UNITS = {
+    'day': 'D',
+    'month': 'M',
+    'year': 'Y'
+}
+# aggregates besides percentiles, which are written as p50, p95, p99.9...
+AGGREGATES = ('min', 'max', 'mean', 'count', 'sum')
+# decimal places kept for aggregates computed from several readings
+DERIVED_DECIMALS = 4
+
+
+class QueryProcessor(Processor):
+    """Answers aggregate queries over a timestamp range and a list of stations"""
+    def __init__(
+        self,
+        zone_maps: Dict[str, List[Dict]],
+        start: str,
+        end: str,
+        stations: List[str],
+        aggregates: List[str],
+        group_by: str = 'month',
+        columns: Tuple[str] = VALUE_ZONE_MAP_COLS,
+        workers: int = QUERY_WORKERS,
+        station_codes: Dict[str, str] = None
+    ) -> None:
+        super().__init__(
+            required_years=None,
+            location=None,
+            zone_maps=zone_maps,
+            workers=workers,
+            stations=station_codes
+        )
+        unknown = [
+            station for station in stations if station not in self.station_dictionary
+        ]
+        if unknown:
+            raise ValueError(f'Unknown stations: {", ".join(unknown)}')
+        if group_by not in GROUP_BY_UNITS:
+            raise ValueError(f'Cannot group by {group_by}')
+        unknown = [col for col in columns if col not in VALUE_ZONE_MAP_COLS]
+        if unknown:
+            raise ValueError(f'Cannot aggregate columns: {", ".join(unknown)}')
+        self.start = to_minutes(start)
+        self.end = to_minutes(end)
+        self.stations = stations
+        self.station_codes = [self.station_dictionary[station] for station in stations]
+        self.aggregates = aggregates
+        self.percentiles = [self.parse_percentile(name) for name in aggregates
+                            if name not in AGGREGATES]
+        self.group_by = group_by
+        self.columns = columns
+
+    def parse_percentile(self, name: str) -> float:
+        try:
+            percentile = float(name[1:]) if name.startswith('p') else None
+        except ValueError:
+            percentile = None
+        if percentile is None or not 0 <= percentile <= 100:
+            raise ValueError(f'Unknown aggregate {name}')
+        return percentile
+
+    @TRACER.traced('aggregate')
+    def run(self) -> List[Dict[str, Union[str, int, float]]]:
+        """Aggregates every zone within the time range and merges the partial results"""
+        zones = self.select_zones()
+        # tasks only carry the predicates of their zone, not the processor
+        results = self.run_tasks(
+            func=aggregate_time_range,
+            tasks=[self.zone_task(zone=zone) for zone in zones]
+        )
+        groups = {}
+        for zone_groups in results:
+            for key, col_partials in zone_groups.items():
+                if key not in groups:
+                    groups[key] = col_partials
+                    continue
+                groups[key] = {
+                    col: self.merge_partials(partial, col_partials[col])
+                    for col, partial in groups[key].items()
+                }
+        return self.finalize(groups=groups)
+
+    def select_zones(self) -> List[int]:
+        """Pushes the time range and station predicates down to the zone maps"""
+        zones = []
+        for zone, min_max_dict in enumerate(self.zone_maps['Timestamp']):
+            if to_minutes(min_max_dict['max_date']) < self.start:
+                continue
+            # zones of the station layout are not in timestamp order
+            if to_minutes(min_max_dict['min_date']) >= self.end:
+                continue
+            if not self.has_stations(zone=zone):
+                continue
+            if not any(self.has_values(col=col, zone=zone) for col in self.columns):
+                continue
+            zones.append(zone)
+        timestamp_zones = self.zone_maps['Timestamp']
+        TRACER.count(
+            zones_considered=len(timestamp_zones),
+            zones_pruned=len(timestamp_zones) - len(zones)
+        )
+        return zones
+
+    def has_stations(self, zone: int) -> bool:
+        """Checks with the zone map if a zone holds rows of any queried station"""
+        stations = self.zone_maps['Station'][zone]['stations']
+        return any(stations.get(code, 0) > 0 for code in self.station_codes)
+
+    def zone_task(self, zone: int) -> Tuple:
+        """
+        Builds the aggregate_time_range task of a zone. Zones that lie within
+        the time range, as the zones of whole year or month partitions do, get
+        no time range, and zones holding queried stations only get no station
+        codes, so their rows are not checked one by one.
+        """
+        entry = self.zone_maps['Timestamp'][zone]
+        start, end = self.start, self.end
+        first, last = to_minutes(entry['min_date']), to_minutes(entry['max_date'])
+        if start <= first and last < end:
+            start, end = None, None
+        station_codes = [int(code) for code in self.station_codes]
+        zone_stations = self.zone_maps['Station'][zone]['stations']
+        if all(code in self.station_codes for code in zone_stations):
+            station_codes = None
+        return (
+            zone,
+            start,
+            end,
+            station_codes,
+            self.columns,
+            GROUP_BY_UNITS[self.group_by],
+            self.percentiles
+        )
+
+    def merge_partials(self, partial: List, other: List) -> List:
+        """Combines the partial aggregates of the same group from two zones"""
+        count, total, minimum, maximum, values = partial
+        other_count, other_total, other_minimum, other_maximum, other_values = other
+        if values is not None:
+            values = np.concatenate([values, other_values])
+        return [
+            count + other_count,
+            total + other_total,
+            min(minimum, other_minimum),
+            max(maximum, other_maximum),
+            values
+        ]
+
+    def finalize(self, groups: Dict) -> List[Dict[str, Union[str, int, float]]]:
+        """Turns the merged partial aggregates into result rows"""
+        codes_to_stations = {
+            int(code): name for code, name in self.station_names.items()
+        }
+        unit = GROUP_BY_UNITS[self.group_by]
+        rows = []
+        for (code, label), col_partials in sorted(groups.items()):
+            for col in self.columns:
+                count, total, minimum, maximum, values = col_partials[col]
+                # groups without readings of this column have nothing to report
+                if not count:
+                    continue
+                row = {
+                    'Group': str(np.datetime64(label, unit)),
+                    'Station': codes_to_stations[code],
+                    'Column': col
+                }
+                for name in self.aggregates:
+                    if name == 'min':
+                        row[name] = float(str(minimum))
+                    elif name == 'max':
+                        row[name] = float(str(maximum))
+                    elif name == 'count':
+                        row[name] = count
+                    elif name == 'sum':
+                        row[name] = round(total, DERIVED_DECIMALS)
+                    elif name == 'mean':
+                        row[name] = round(total / count, DERIVED_DECIMALS)
+                    else:
+                        percentile = np.percentile(values, self.parse_percentile(name))
+                        row[name] = round(float(percentile), DERIVED_DECIMALS)
+                rows.append(row)
+        return rows
+
+
+def aggregate_time_range(
+    task: Tuple[int, int, int, List[int], Tuple[str], str, List[float]]
+) -> Dict[Tuple[int, int], Dict]:
+    """
+    Computes the partial aggregates of every (station, group) in one zone, of
+    the rows within [start, end) and of station_codes, unless left out
+    """
+    zone, start, end, station_codes, columns, unit, percentiles = task
+    timestamps = read_column(col='Timestamp', zone=zone)
+    stations = read_column(col='Station', zone=zone)
+    mask = zone_mask(
+        timestamps=timestamps,
+        stations=stations,
+        start=start,
+        end=end,
+        station_codes=station_codes
+    )
+    labels = (
+        timestamps[mask]
+        .astype('datetime64[m]')
+        .astype(f'datetime64[{unit}]')
+        .astype(np.int64)
+    )
+    TRACER.count(rows_in=len(timestamps), rows_out=len(labels))
+    if not len(labels):
+        return {}
+    groups, order, starts, _ = group_rows(stations=stations[mask], labels=labels)
+    col_partials = {}
+    for col in columns:
+        values = read_column(col=col, zone=zone)[mask][order]
+        col_partials[col] = reduce_partials(
+            values=values,
+            starts=starts,
+            keep_values=bool(percentiles)
+        )
+    zone_groups = {}
+    for i, group in enumerate(groups):
+        zone_groups[group] = {
+            col: [partials[i] for partials in col_partials[col]]
+            for col in columns
+        }
+    return zone_groups
+
+
+def zone_mask(
+    timestamps: np.ndarray,
+    stations: np.ndarray,
+    start: int = None,
+    end: int = None,
+    station_codes: List[int] = None
+) -> Union[np.ndarray, slice]:
+    """Flags the rows within [start, end) and of station_codes, if given"""
+    mask = True
+    if start is not None:
+        mask = (timestamps >= start) & (timestamps < end)
+    if station_codes is not None:
+        mask = mask & np.isin(stations, station_codes)
+    return slice(None) if mask is True else mask
+
+
+def reduce_partials(
+    values: np.ndarray,
+    starts: np.ndarray,
+    keep_values: bool = False
+) -> List[List]:
+    """
+    Reduces each run of values beginning at starts, ignoring missing readings,
+    and keeps the readings of each run if keep_values, for percentiles
+    """
+    reduced = reduce_runs(values=values, starts=starts)
+    runs = [None] * len(starts)
+    if keep_values:
+        runs = [run[~np.isnan(run)] for run in np.split(values, starts[1:])]
+    return [
+        reduced['count'].tolist(),
+        reduced['sum'].tolist(),
+        list(reduced['min']),
+        list(reduced['max']),
+        runs
+    ]
@@ -0,0 +1,188 @@
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import numpy as np
+from project_config import (
+    BENCHMARK_FOLDER,
+    BENCHMARK_ROWS,
+    MAPPER,
+    ZONE_MAP_COLS
+)
+from typing import Dict, Iterator, List
+from column_cache import COLUMN_CACHE
+from generate_data import generate_data
+from ingest import split_columns
+from main import parse_matric_num
+from monthly_summary import build_summary
+from Processor import Processor
+
+# query timed against every generated file
+BENCHMARK_MATRIC = 'u2022913c'
+# counters of /proc/self/io reported by each stage, and the names they are kept as
+IO_COUNTERS = {
+    'rchar': 'bytes_read',
+    'wchar': 'bytes_written',
+    'read_bytes': 'disk_bytes_read',
+    'write_bytes': 'disk_bytes_written'
+}
+
+
+def read_io_counters() -> Dict[str, int]:
+    """Reads the I/O done by this process so far, empty if the platform has no /proc"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            lines = [line.split(':') for line in f]
+    except OSError:
+        return {}
+    return {name.strip(): int(value) for name, value in lines}
+
+
+def reset_peak_rss() -> None:
+    """Lowers the peak resident set size to the current one, on Linux only"""
+    with contextlib.suppress(OSError):
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    return
+
+
+def read_peak_rss() -> int:
+    """Gets the peak resident set size in bytes, since the last reset_peak_rss"""
+    with contextlib.suppress(OSError):
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    # without /proc the peak covers the whole run, in kilobytes except on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextlib.contextmanager
+def measure(stage: str, stages: List[Dict]) -> Iterator[None]:
+    """Times the block and records its peak memory and I/O as a stage"""
+    reset_peak_rss()
+    counters = read_io_counters()
+    start = time.perf_counter()
+    # progress output of the stages would drown the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+    seconds = time.perf_counter() - start
+    ended = read_io_counters()
+    record = {'stage': stage, 'seconds': round(seconds, 4), 'peak_rss': read_peak_rss()}
+    for counter, name in IO_COUNTERS.items():
+        record[name] = ended[counter] - counters[counter] if counter in ended else None
+    stages.append(record)
+    print(
+        f'  {stage:<32} {seconds:>9.3f}s {record["peak_rss"] / (1024 * 1024):>9.1f} MB',
+        file=sys.stderr
+    )
+    return
+
+
+def benchmark_rows(rows: int, seed: int, matric_num: str) -> Dict:
+    """
+    Generates a data file of rows readings unless it exists, then times its
+    split and each stage of a query scanning the columns and looking the
+    monthly summary up. Runs in a folder of its own under BENCHMARK_FOLDER.
+    """
+    folder = os.path.abspath(f'{BENCHMARK_FOLDER}/{rows}')
+    os.makedirs(folder, exist_ok=True)
+    data_file = f'{folder}/SingaporeWeather_{seed}.csv'
+    print(f'{rows} rows', file=sys.stderr)
+    stages = []
+    if not os.path.isfile(data_file):
+        with measure(stage='generate_data', stages=stages):
+            generate_data(data_file=f'{data_file}.part', rows=rows, seed=seed)
+            os.replace(f'{data_file}.part', data_file)
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        with measure(stage='split_columns', stages=stages):
+            zone_maps = split_columns(
+                data_file=data_file,
+                zone_maps={col: [] for col in ZONE_MAP_COLS},
+                dictionaries=copy.deepcopy(MAPPER)
+            )
+        with measure(stage='build_summary', stages=stages):
+            summary = build_summary(zone_maps=zone_maps)
+        required_years, location = parse_matric_num(matric_num=matric_num)
+        query_steps = {
+            'scan': [('process_location', {}), ('aggregate_months', {})],
+            'summary': [('summarize_months', {'summary': summary})]
+        }
+        for path, steps in query_steps.items():
+            # each query starts from the columns on disk
+            COLUMN_CACHE.clear()
+            with measure(stage=f'{path}.build_directory', stages=stages):
+                processor = Processor(
+                    required_years=required_years,
+                    location=location,
+                    zone_maps=zone_maps
+                )
+            write_step = ('write_query_results', {
+                'matric_num': f'{path}_{matric_num}',
+                'required_years': required_years,
+                'location': location
+            })
+            for step, kwargs in [('process_month_and_year', {}), *steps, write_step]:
+                with measure(stage=f'{path}.{step}', stages=stages):
+                    getattr(processor, step)(**kwargs)
+    finally:
+        os.chdir(cwd)
+    return {
+        'rows': rows,
+        'seed': seed,
+        'matric_num': matric_num,
+        'file_bytes': os.stat(data_file).st_size,
+        'zones': len(zone_maps['Timestamp']),
+        'stages': stages
+    }
+
+
+def main() -> None:
+    """Times ingest and query stages on generated data files of growing sizes"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='+',
+        default=list(BENCHMARK_ROWS),
+        help='sizes of the generated data files, in rows'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--matric', default=BENCHMARK_MATRIC)
+    parser.add_argument(
+        '--output',
+        default=f'{BENCHMARK_FOLDER}/results.json',
+        help='json file the measurements are written to'
+    )
+    parser.add_argument('--label', help='name of the version benchmarked, e.g. a tag')
+    args = parser.parse_args()
+
+    report = {
+        'label': args.label,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'runs': [
+            benchmark_rows(rows=rows, seed=args.seed, matric_num=args.matric)
+            for rows in args.rows
+        ]
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+    print(f'Measurements written to {args.output}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+from project_config import (
+    CATALOG_FILE,
+    CATALOG_VERSION,
+    FINGERPRINT_BYTES,
+    INGEST_LAYOUT,
+    INGEST_PARTITION,
+    MAPPER,
+    MAX_FILE_LINE,
+    SPLIT_DATA_FOLDER,
+    ZONE_TARGET_BYTES
+)
+from column_store import COLUMN_CODECS, COLUMN_DTYPES
+from data_source import is_plain_file, list_sources
+from typing import Dict, List, Optional
+import hashlib
+import json
+import os
+import sys
+
+
+def fingerprint(data_file: str, length: int) -> str:
+    """Hashes the head and the tail of the first length bytes of a file"""
+    digest = hashlib.blake2b(str(length).encode(), digest_size=16)
+    with open(data_file, 'rb') as f:
+        digest.update(f.read(min(length, FINGERPRINT_BYTES)))
+        tail_start = max(length - FINGERPRINT_BYTES, FINGERPRINT_BYTES)
+        if tail_start < length:
+            f.seek(tail_start)
+            digest.update(f.read(length - tail_start))
+    return digest.hexdigest()
+
+
+def source_key(data_file: str) -> Dict:
+    """
+    Identifies the version of the data file the split columns were built from,
+    or of each file of a directory, a glob or a compressed file
+    """
+    if is_plain_file(data_source=data_file):
+        return file_key(data_file=data_file)
+    files = [
+        {'path': path, **file_key(data_file=path)}
+        for path in list_sources(data_source=data_file)
+    ]
+    digest = hashlib.blake2b(digest_size=16)
+    for key in files:
+        digest.update(key['fingerprint'].encode())
+    return {
+        'size': sum(key['size'] for key in files),
+        'mtime': max(key['mtime'] for key in files),
+        'fingerprint': digest.hexdigest(),
+        'files': files
+    }
+
+
+def file_key(data_file: str) -> Dict:
+    stat = os.stat(data_file)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'fingerprint': fingerprint(data_file=data_file, length=stat.st_size)
+    }
+
+
+def count_rows(zone_maps: Dict) -> int:
+    timestamp_zones = zone_maps['Timestamp']
+    if not timestamp_zones:
+        return 0
+    return max(timestamp_zones[-1]['max_idx'] + 1, 0)
+
+
+def load_catalog() -> Optional[Dict]:
+    """Returns the saved catalog if its split columns can be read by this version"""
+    if not os.path.isfile(CATALOG_FILE):
+        return None
+    try:
+        with open(CATALOG_FILE, 'r') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if catalog.get('version') != CATALOG_VERSION:
+        return None
+    if catalog.get('max_file_line') != MAX_FILE_LINE:
+        return None
+    if catalog.get('zone_target_bytes') != ZONE_TARGET_BYTES:
+        return None
+    if catalog.get('columns') != column_metadata(list(catalog.get('columns', {}))):
+        return None
+    return catalog
+
+
+def open_catalog(data_file: str = None) -> Dict:
+    """
+    Gets the catalog of the split columns for tools that only read them, which
+    never split or append. The columns must have been split from data_file if
+    given. Columns older than their data file are used with a warning.
+    """
+    catalog = load_catalog()
+    if catalog is None:
+        raise ValueError(
+            f'No split columns in {SPLIT_DATA_FOLDER}, '
+            'run src/main.py to split the data file first'
+        )
+    if data_file is not None and os.path.abspath(data_file) != catalog['data_file']:
+        raise ValueError(
+            f'The split columns were built from {catalog["data_file"]}, '
+            f'not {data_file}, run src/main.py --data-file {data_file} first'
+        )
+    try:
+        is_stale = not is_current(catalog=catalog, data_file=catalog['data_file'])
+    except OSError:
+        is_stale = True
+    if is_stale:
+        print(
+            f'Warning: {catalog["data_file"]} changed since it was split, '
+            'run src/main.py to pick the changes up',
+            file=sys.stderr
+        )
+    return catalog
+
+
+def is_current(catalog: Dict, data_file: str) -> bool:
+    """Checks if the catalog was built from the current data file"""
+    return catalog['source'] == source_key(data_file=data_file)
+
+
+def is_prefix(catalog: Dict, data_file: str) -> bool:
+    """Checks if the data file only had rows appended since the catalog was built"""
+    if 'files' in catalog['source'] or not is_plain_file(data_source=data_file):
+        return False
+    size = catalog['source']['size']
+    if os.stat(data_file).st_size <= size:
+        return False
+    return catalog['source']['fingerprint'] == fingerprint(
+        data_file=data_file,
+        length=size
+    )
+
+
+def new_sources(catalog: Dict, data_file: str) -> List[str]:
+    """
+    Lists the files added to a directory or glob since the catalog was built,
+    if they sort after every file it was built from and those are unchanged
+    """
+    files = catalog['source'].get('files')
+    if files is None or is_plain_file(data_source=data_file):
+        return []
+    current = source_key(data_file=data_file)['files']
+    if current[:len(files)] != files:
+        return []
+    return [key['path'] for key in current[len(files):]]
+
+
+def is_appended(catalog: Dict, delta_file: str) -> bool:
+    """Checks if a delta csv was already appended to the split columns"""
+    key = source_key(data_file=delta_file)
+    return any(
+        delta['size'] == key['size'] and delta['fingerprint'] == key['fingerprint']
+        for delta in catalog['deltas']
+    )
+
+
+def save_catalog(
+    data_file: str,
+    columns: List[str],
+    zone_maps: Dict,
+    deltas: List[Dict] = None,
+    dictionaries: Dict[str, Dict[str, str]] = None,
+    layout: str = INGEST_LAYOUT,
+    partition: str = INGEST_PARTITION,
+    summary: Dict[str, Dict] = None
+) -> Dict:
+    """Writes the zone maps and column metadata next to the split columns"""
+    catalog = {
+        'version': CATALOG_VERSION,
+        # the data source the columns were split from, found again by read only tools
+        'data_file': os.path.abspath(data_file),
+        'source': source_key(data_file=data_file),
+        'deltas': deltas or [],
+        'columns': column_metadata(columns=columns),
+        # code of every value of the dictionary encoded csv columns
+        'dictionaries': dictionaries if dictionaries is not None else MAPPER,
+        'layout': layout,
+        # how zones are cut, see zone_planner
+        'partition': partition,
+        # per (station, month) readings summary, see monthly_summary
+        'summary': summary,
+        'max_file_line': MAX_FILE_LINE,
+        'zone_target_bytes': ZONE_TARGET_BYTES,
+        'row_count': count_rows(zone_maps=zone_maps),
+        'zone_maps': zone_maps
+    }
+    # write to a temporary file first so a crash never leaves half a catalog
+    temp_file = f'{CATALOG_FILE}.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(catalog, f)
+    os.replace(temp_file, CATALOG_FILE)
+    return catalog
+
+
+def column_metadata(columns: List[str]) -> Dict[str, Optional[Dict[str, str]]]:
+    return {
+        col: {
+            'dtype': COLUMN_DTYPES[col].__name__,
+            'codec': COLUMN_CODECS[col]
+        } if col in COLUMN_DTYPES else None
+        for col in columns
+    }
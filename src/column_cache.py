@@ -0,0 +1,74 @@
+from project_config import COLUMN_CACHE_BYTES
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+import threading
+import numpy as np
+
+
+class ColumnCache:
+    """
+    Byte budgeted LRU cache of decoded column zones, keyed by (column, zone).
+    Safe to share between the threads of a process.
+    """
+    def __init__(self, max_bytes: int = COLUMN_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.chunks: 'OrderedDict[Tuple[str, int], np.ndarray]' = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        col: str,
+        zone: int,
+        load: Callable[[str, int], np.ndarray]
+    ) -> np.ndarray:
+        """Returns the cached chunk, loading and caching it on a miss"""
+        key = (col, zone)
+        with self.lock:
+            if key in self.chunks:
+                self.hits += 1
+                self.chunks.move_to_end(key)
+                return self.chunks[key]
+            self.misses += 1
+        # loaded without the lock, so other threads keep using the cache
+        chunk = load(col, zone)
+        # a chunk larger than the whole budget is used once and not kept
+        if chunk.nbytes > self.max_bytes:
+            return chunk
+        chunk.flags.writeable = False
+        with self.lock:
+            if key not in self.chunks:
+                self.chunks[key] = chunk
+                self.nbytes += chunk.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.chunks.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return chunk
+
+    def discard(self, col: str, zone: int) -> None:
+        """Drops a chunk whose zone was rewritten"""
+        with self.lock:
+            chunk = self.chunks.pop((col, zone), None)
+            if chunk is not None:
+                self.nbytes -= chunk.nbytes
+        return
+
+    def clear(self) -> None:
+        with self.lock:
+            self.chunks.clear()
+            self.nbytes = 0
+        return
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'chunks': len(self.chunks),
+            'bytes': self.nbytes
+        }
+
+
+# shared by every stage and query for as long as the process lives
+COLUMN_CACHE = ColumnCache()
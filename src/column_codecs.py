@@ -0,0 +1,147 @@
+from typing import Dict, Tuple
+import numpy as np
+
+# signed integer types tried in order when narrowing encoded values
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+# decimal scales tried in order by the scaled integer codec
+SCALES = (1, 10, 100)
+
+
+def narrowest_int(lowest: int, highest: int, reserve_min: bool = False) -> type:
+    """Finds the smallest signed integer type holding [lowest, highest]"""
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min + reserve_min <= lowest and highest <= info.max:
+            return dtype
+    return np.int64
+
+
+class PlainCodec:
+    """Stores values as they are, in the on-disk type of the column"""
+    name = 'plain'
+
+    def encode(self, values: np.ndarray) -> Tuple[Dict, np.ndarray]:
+        return {'codec': self.name, 'dtype': values.dtype.name}, values
+
+    def decode(self, header: Dict, payload: bytes) -> np.ndarray:
+        return np.frombuffer(payload, dtype=header['dtype'])
+
+
+class DeltaCodec(PlainCodec):
+    """Stores the first value and the differences between consecutive values"""
+    name = 'delta'
+
+    def encode(self, values: np.ndarray) -> Tuple[Dict, np.ndarray]:
+        base = int(values[0]) if len(values) else 0
+        deltas = np.diff(values.astype(np.int64), prepend=base)
+        delta_dtype = narrowest_int(
+            lowest=int(deltas.min(initial=0)),
+            highest=int(deltas.max(initial=0))
+        )
+        header = {
+            'codec': self.name,
+            'dtype': values.dtype.name,
+            'base': base,
+            'delta_dtype': np.dtype(delta_dtype).name
+        }
+        return header, deltas.astype(delta_dtype)
+
+    def decode(self, header: Dict, payload: bytes) -> np.ndarray:
+        deltas = np.frombuffer(payload, dtype=header['delta_dtype'])
+        values = header['base'] + np.cumsum(deltas, dtype=np.int64)
+        return values.astype(header['dtype'])
+
+
+class DictionaryCodec(PlainCodec):
+    """Stores the index of each value into the sorted distinct values, bit packed"""
+    name = 'dictionary'
+
+    def encode(self, values: np.ndarray) -> Tuple[Dict, np.ndarray]:
+        dictionary, indexes = np.unique(values, return_inverse=True)
+        # 0 bits when every row holds the same value
+        bits = next(
+            bits for bits in (0, 1, 2, 4, 8, 16)
+            if len(dictionary) <= 1 << bits
+        )
+        header = {
+            'codec': self.name,
+            'dtype': values.dtype.name,
+            'rows': len(values),
+            'dictionary': dictionary.tolist(),
+            'bits': bits
+        }
+        if bits >= 8:
+            return header, indexes.astype(np.uint8 if bits == 8 else np.uint16)
+        if not bits:
+            return header, np.empty(0, dtype=np.uint8)
+        per_byte = 8 // bits
+        padded = np.zeros(-(-len(indexes) // per_byte) * per_byte, dtype=np.uint8)
+        padded[:len(indexes)] = indexes
+        padded = padded.reshape(-1, per_byte)
+        packed = np.zeros(len(padded), dtype=np.uint8)
+        for k in range(per_byte):
+            packed |= padded[:, k] << (8 - bits * (k + 1))
+        return header, packed
+
+    def indexes(self, header: Dict, payload: bytes) -> np.ndarray:
+        """Unpacks the dictionary index of every row"""
+        bits, rows = header['bits'], header['rows']
+        if bits >= 8:
+            return np.frombuffer(payload, dtype=np.uint8 if bits == 8 else np.uint16)
+        if not bits:
+            return np.zeros(rows, dtype=np.uint8)
+        packed = np.frombuffer(payload, dtype=np.uint8)
+        per_byte = 8 // bits
+        mask = (1 << bits) - 1
+        indexes = np.empty((len(packed), per_byte), dtype=np.uint8)
+        for k in range(per_byte):
+            indexes[:, k] = (packed >> (8 - bits * (k + 1))) & mask
+        return indexes.ravel()[:rows]
+
+    def decode(self, header: Dict, payload: bytes) -> np.ndarray:
+        dictionary = np.array(header['dictionary'], dtype=header['dtype'])
+        return dictionary[self.indexes(header=header, payload=payload)]
+
+
+class ScaledCodec(PlainCodec):
+    """
+    Stores readings with few decimal places as scaled integers, the lowest
+    integer stands in for a missing reading. Falls back to plain values if
+    the readings cannot be restored exactly.
+    """
+    name = 'scaled'
+
+    def encode(self, values: np.ndarray) -> Tuple[Dict, np.ndarray]:
+        present = ~np.isnan(values)
+        for scale in SCALES:
+            scaled = np.round(values[present].astype(np.float64) * scale)
+            if len(scaled) and np.abs(scaled).max() >= np.iinfo(np.int32).max:
+                break
+            lowest = int(scaled.min()) if len(scaled) else 0
+            highest = int(scaled.max()) if len(scaled) else 0
+            int_dtype = narrowest_int(lowest=lowest, highest=highest, reserve_min=True)
+            header = {
+                'codec': self.name,
+                'dtype': values.dtype.name,
+                'scale': scale,
+                'int_dtype': np.dtype(int_dtype).name
+            }
+            ints = np.full(len(values), np.iinfo(int_dtype).min, dtype=int_dtype)
+            ints[present] = scaled
+            decoded = self.decode(header=header, payload=ints.tobytes())
+            if np.array_equal(decoded, values, equal_nan=True):
+                return header, ints
+        return CODECS['plain'].encode(values=values)
+
+    def decode(self, header: Dict, payload: bytes) -> np.ndarray:
+        ints = np.frombuffer(payload, dtype=header['int_dtype'])
+        dtype = np.dtype(header['dtype']).type
+        values = ints.astype(dtype) / dtype(header['scale'])
+        values[ints == np.iinfo(ints.dtype).min] = np.nan
+        return values
+
+
+CODECS = {
+    codec.name: codec
+    for codec in (PlainCodec(), DeltaCodec(), DictionaryCodec(), ScaledCodec())
+}
@@ -0,0 +1,226 @@
+from project_config import SPLIT_DATA_FOLDER, MISSING_VALUE, SCAN_BATCH_ROWS
+from column_cache import COLUMN_CACHE
+from column_codecs import CODECS
+from tracing import TRACER
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+import bisect
+import json
+import os
+import numpy as np
+
+# on-disk type of every column written to split_data
+COLUMN_DTYPES = {
+    'id': np.int64,
+    'Timestamp': np.int64,  # minutes since 1970-01-01 00:00
+    'Station': np.uint16,
+    'Temperature': np.float32,  # NaN stands in for a missing reading
+    'Humidity': np.float32
+}
+# codec each column is encoded with on disk, see column_codecs
+COLUMN_CODECS = {
+    'id': 'delta',
+    'Timestamp': 'delta',
+    'Station': 'dictionary',
+    'Temperature': 'scaled',
+    'Humidity': 'scaled'
+}
+# bytes of the little endian length of the json header starting every column file
+HEADER_LENGTH_BYTES = 4
+
+
+def column_path(col: str, zone: int) -> str:
+    return f'{SPLIT_DATA_FOLDER}/{col}_{zone}.bin'
+
+
+def encode_values(col: str, values: List[str]) -> np.ndarray:
+    """Converts the raw csv strings of a column into its typed array"""
+    dtype = COLUMN_DTYPES[col]
+    if col == 'Timestamp':
+        return np.array(values, dtype='datetime64[m]').astype(dtype)
+    if np.issubdtype(dtype, np.floating):
+        values = ['nan' if value == MISSING_VALUE else value for value in values]
+    return np.array(values).astype(dtype)
+
+
+def write_column(col: str, zone: int, values: np.ndarray) -> None:
+    """
+    Appends typed values to a column zone, creating the file if needed.
+    The zone is encoded again as a whole, so its codec fits all of its values,
+    and renamed over the old file, so maps of the old file stay readable.
+    """
+    path = column_path(col=col, zone=zone)
+    values = values.astype(COLUMN_DTYPES[col], copy=False)
+    if os.path.exists(path):
+        values = np.concatenate([open_column(col=col, zone=zone), values])
+    header, payload = CODECS[COLUMN_CODECS[col]].encode(values=values)
+    header_bytes = json.dumps(header).encode()
+    with open(f'{path}.tmp', 'wb') as f:
+        f.write(len(header_bytes).to_bytes(HEADER_LENGTH_BYTES, 'little'))
+        f.write(header_bytes)
+        f.write(payload.tobytes())
+    os.replace(f'{path}.tmp', path)
+    COLUMN_CACHE.discard(col=col, zone=zone)
+    TRACER.count(files_written=1)
+    return
+
+
+def read_header(f: BinaryIO) -> Tuple[Dict, int]:
+    """Reads the codec header starting a column file, and where its payload starts"""
+    length = int.from_bytes(f.read(HEADER_LENGTH_BYTES), 'little')
+    return json.loads(f.read(length)), HEADER_LENGTH_BYTES + length
+
+
+def open_column(col: str, zone: int) -> np.ndarray:
+    """
+    Decodes a column zone from disk in bulk, row i of the zone is at offset i.
+    Plain zones need no decoding and are memory-mapped after their header
+    instead, so only the rows looked up are read.
+    """
+    with open(column_path(col=col, zone=zone), 'rb') as f:
+        header, offset = read_header(f=f)
+        if header['codec'] == 'plain' and os.fstat(f.fileno()).st_size > offset:
+            TRACER.count(zones_opened=1, bytes_read=offset)
+            return np.memmap(f, dtype=header['dtype'], mode='r', offset=offset)
+        payload = f.read()
+    TRACER.count(zones_opened=1, bytes_read=offset + len(payload))
+    return CODECS[header['codec']].decode(header=header, payload=payload)
+
+
+def read_column(col: str, zone: int) -> np.ndarray:
+    """Gets a column zone decoded in memory, through the shared column cache"""
+    return COLUMN_CACHE.get(
+        col=col,
+        zone=zone,
+        load=open_column
+    )
+
+
+def zone_items(zones: Dict[int, Dict], row: int) -> List[Tuple[int, Dict]]:
+    """
+    Lists the (zone, zone map entry) of zones, in zone order, from the one
+    holding a row on. zones maps zone numbers to their zone map entries, all
+    of a column or only the ones a task needs.
+    """
+    items = sorted(zones.items())
+    first = bisect.bisect_right(items, row, key=lambda item: item[1]['min_idx']) - 1
+    return items[max(first, 0):]
+
+
+def split_range(
+    zones: Dict[int, Dict],
+    start_row: int,
+    end_row: int
+) -> List[Tuple[int, int, int]]:
+    """Splits rows [start_row, end_row) into a (zone, start_row, end_row) per zone"""
+    pieces = []
+    for zone, min_max_dict in zone_items(zones=zones, row=start_row):
+        if start_row >= end_row:
+            break
+        stop = min(end_row, min_max_dict['max_idx'] + 1)
+        if start_row < stop:
+            pieces.append((zone, start_row, stop))
+        start_row = max(start_row, stop)
+    return pieces
+
+
+def scan_range(
+    col: str,
+    zones: Dict[int, Dict],
+    start_row: int,
+    end_row: int,
+    batch_rows: int = SCAN_BATCH_ROWS
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yields (row_ids, values) batches of at most batch_rows rows of col for
+    rows [start_row, end_row), moving through consecutive zones one at a time
+    """
+    for zone, zone_start, zone_end in split_range(zones, start_row, end_row):
+        min_idx = zones[zone]['min_idx']
+        values = read_column(col=col, zone=zone)
+        for batch_start in range(zone_start, zone_end, batch_rows):
+            batch_end = min(batch_start + batch_rows, zone_end)
+            yield (
+                np.arange(batch_start, batch_end, dtype=np.int64),
+                values[batch_start - min_idx:batch_end - min_idx]
+            )
+
+
+def scan_positions(
+    col: str,
+    zones: Dict[int, Dict],
+    positions: np.ndarray,
+    batch_rows: int = SCAN_BATCH_ROWS
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yields (row_ids, values) batches of col at sorted row positions"""
+    if not len(positions):
+        return
+    i = 0
+    for zone, min_max_dict in zone_items(zones=zones, row=int(positions[0])):
+        if i >= len(positions):
+            break
+        min_idx = min_max_dict['min_idx']
+        end = int(np.searchsorted(positions, min_max_dict['max_idx'], side='right'))
+        if end > i:
+            values = read_column(col=col, zone=zone)
+            for batch_start in range(i, end, batch_rows):
+                batch_end = min(batch_start + batch_rows, end)
+                row_ids = np.asarray(positions[batch_start:batch_end])
+                yield row_ids, values[row_ids - min_idx]
+        i = max(i, end)
+
+
+def group_rows(
+    stations: np.ndarray,
+    labels: np.ndarray
+) -> Tuple[List[Tuple[int, int]], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Groups rows by (station code, integer label), such as a month or a day.
+    Returns every (station, label) group in order, the stable order sorting
+    the rows into their groups, and where each group starts in that order
+    and how many rows it has.
+    """
+    lowest = int(labels.min())
+    # one integer per (station, label), rows are sorted by it into runs
+    keys = stations.astype(np.int64) << 32 | (labels - lowest)
+    order = np.argsort(keys, kind='stable')
+    unique_keys, starts, counts = np.unique(
+        keys[order],
+        return_index=True,
+        return_counts=True
+    )
+    groups = [(key >> 32, (key & 0xFFFFFFFF) + lowest) for key in unique_keys.tolist()]
+    return groups, order, starts, counts
+
+
+def reduce_runs(values: np.ndarray, starts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Counts, sums and finds the min and max of the readings of each run of
+    values beginning at starts. Missing readings are left out, a run without
+    any has a min of inf and a max of -inf.
+    """
+    missing = np.isnan(values)
+    return {
+        'count': np.add.reduceat(~missing, starts).astype(np.int64),
+        'sum': np.add.reduceat(np.where(missing, 0, values).astype(np.float64), starts),
+        'min': np.minimum.reduceat(np.where(missing, np.inf, values), starts),
+        'max': np.maximum.reduceat(np.where(missing, -np.inf, values), starts)
+    }
+
+
+def to_minutes(timestamp: str) -> int:
+    """Converts a 'YYYY-MM-DD HH:MM' timestamp into the stored representation"""
+    return int(np.datetime64(timestamp, 'm').astype(np.int64))
+
+
+def minutes_to_dates(minutes: np.ndarray) -> np.ndarray:
+    """Converts stored timestamps into 'YYYY-MM-DD' strings"""
+    return minutes.astype('datetime64[m]').astype('datetime64[D]').astype(str)
+
+
+def minutes_to_months_since_epoch(minutes: np.ndarray) -> np.ndarray:
+    return minutes.astype('datetime64[m]').astype('datetime64[M]').astype(np.int64)
+
+
+def month_key(label: int) -> str:
+    """Converts a count of months since 1970-01 into a 'YYYY-MM' key"""
+    return str(np.datetime64(label, 'M'))
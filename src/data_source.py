@@ -0,0 +1,152 @@
+from project_config import SOURCE_CHUNK_BYTES, SOURCE_QUEUE_CHUNKS
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+import glob
+import gzip
+import lzma
+import os
+import queue
+import threading
+
+# suffixes of the files of a directory or glob that are read
+SOURCE_SUFFIXES = ('.csv', '.csv.gz', '.csv.xz')
+# how the files of each compressed suffix are opened
+OPENERS = {
+    '.gz': gzip.open,
+    '.xz': lzma.open
+}
+
+
+def list_sources(data_source: str) -> List[str]:
+    """
+    Lists the files of a data source in the order their rows are read, by
+    name for a directory or a glob
+    """
+    if os.path.isdir(data_source):
+        paths = [
+            os.path.join(data_source, name)
+            for name in os.listdir(data_source)
+            if name.endswith(SOURCE_SUFFIXES)
+        ]
+    elif glob.has_magic(data_source):
+        paths = [path for path in glob.glob(data_source) if os.path.isfile(path)]
+    else:
+        return [data_source]
+    if not paths:
+        raise FileNotFoundError(f'No csv files found in {data_source}')
+    return sorted(paths)
+
+
+def is_plain_file(data_source: str) -> bool:
+    """Checks if a data source is one uncompressed csv, whose rows can be seeked to"""
+    return os.path.isfile(data_source) and not data_source.endswith(tuple(OPENERS))
+
+
+def open_source(path: str) -> BinaryIO:
+    opener = OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, 'rb')
+
+
+def source_size(data_source: str) -> int:
+    """Counts the bytes of the files of a data source, as stored"""
+    return sum(os.path.getsize(path) for path in list_sources(data_source))
+
+
+def read_header(data_source: str) -> List[str]:
+    """Gets the header columns of the first file of a data source"""
+    with open_source(list_sources(data_source)[0]) as f:
+        return f.readline().decode().rstrip().split(',')
+
+
+def read_lines(
+    paths: List[str],
+    chunk_bytes: int = SOURCE_CHUNK_BYTES
+) -> Iterator[str]:
+    """
+    Streams the lines after the header line of each file in turn. Every file
+    must have the header of the first one.
+    """
+    header, path, rest = None, None, b''
+    for chunk_path, chunk in prefetch_chunks(paths=paths, chunk_bytes=chunk_bytes):
+        if chunk_path != path:
+            path, at_header = chunk_path, True
+        if chunk:
+            data = rest + chunk
+            cut = data.rfind(b'\n') + 1
+            lines, rest = data[:cut].decode().split('\n')[:-1], data[cut:]
+        else:
+            # the last line of a file may have no newline
+            lines, rest = ([rest.decode()] if rest else []), b''
+        if at_header and lines:
+            at_header = False
+            file_header = lines.pop(0).rstrip()
+            if header is None:
+                header = file_header
+            elif file_header != header:
+                raise ValueError(f'{path} has columns {file_header}, not {header}')
+        yield from lines
+    return
+
+
+def prefetch_chunks(
+    paths: List[str],
+    chunk_bytes: int = SOURCE_CHUNK_BYTES
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Reads the files in chunks on a thread of its own, so reading and
+    decompressing, which release the GIL, overlap the parsing of the chunks
+    read before. Each file ends with an empty chunk.
+    """
+    chunks = queue.Queue(maxsize=SOURCE_QUEUE_CHUNKS)
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=read_ahead,
+        args=(paths, chunk_bytes, chunks, stop),
+        daemon=True
+    )
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def read_ahead(
+    paths: List[str],
+    chunk_bytes: int,
+    chunks: queue.Queue,
+    stop: threading.Event
+) -> None:
+    """Queues the (path, chunk) of every file, then None, or the error raised"""
+    try:
+        for path in paths:
+            with open_source(path) as f:
+                chunk = None
+                while chunk != b'' and not stop.is_set():
+                    chunk = f.read(chunk_bytes)
+                    put_chunk(chunks=chunks, stop=stop, item=(path, chunk))
+        put_chunk(chunks=chunks, stop=stop, item=None)
+    except Exception as e:
+        put_chunk(chunks=chunks, stop=stop, item=e)
+    return
+
+
+def put_chunk(
+    chunks: queue.Queue,
+    stop: threading.Event,
+    item: Optional[object]
+) -> None:
+    """Waits for room in the queue, giving up once the reader stopped taking chunks"""
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    return
@@ -0,0 +1,97 @@
+import argparse
+import numpy as np
+from project_config import MAPPER, MISSING_VALUE
+from typing import List
+from column_store import to_minutes
+
+# readings are spread evenly over these years, the ones matriculation numbers ask for
+FIRST_TIMESTAMP = '2002-01-01 00:00'
+END_TIMESTAMP = '2022-01-01 00:00'
+# ranges of the generated readings in tenths, bounds included
+TEMPERATURE_TENTHS = (220, 350)
+HUMIDITY_TENTHS = (400, 1000)
+# share of the readings of each column replaced by MISSING_VALUE
+MISSING_RATE = 0.01
+# rows formatted at a time
+GENERATE_CHUNK_ROWS = 256 * 1024
+# rows whose readings are drawn from one random generator, so a file does not
+# depend on the chunk size it is written with
+READING_BLOCK_ROWS = 64 * 1024
+
+
+def generate_data(
+    data_file: str,
+    rows: int,
+    seed: int = 0,
+    stations: List[str] = None,
+    chunk_rows: int = GENERATE_CHUNK_ROWS
+) -> None:
+    """
+    Writes a csv with the schema of SingaporeWeather.csv. Every timestamp has
+    a reading of each station, and timestamps are spread evenly between
+    FIRST_TIMESTAMP and END_TIMESTAMP. The same seed always gives the same file,
+    whatever chunk_rows is.
+    """
+    stations = list(MAPPER['Station']) if stations is None else stations
+    first = to_minutes(FIRST_TIMESTAMP)
+    span = to_minutes(END_TIMESTAMP) - first
+    slots = -(-rows // len(stations))
+    with open(data_file, 'w') as f:
+        f.write('id,Timestamp,Station,Temperature,Humidity\n')
+        for start in range(0, rows, chunk_rows):
+            ids = np.arange(start, min(start + chunk_rows, rows), dtype=np.int64)
+            minutes = first + (ids // len(stations)) * span // slots
+            timestamps = minutes.astype('datetime64[m]')
+            columns = [
+                ids.astype(str),
+                np.char.replace(np.datetime_as_string(timestamps, unit='m'), 'T', ' '),
+                np.array(stations)[ids % len(stations)],
+                readings(ids=ids, seed=seed, column=0, tenths=TEMPERATURE_TENTHS),
+                readings(ids=ids, seed=seed, column=1, tenths=HUMIDITY_TENTHS)
+            ]
+            f.writelines(f'{",".join(row)}\n' for row in zip(*columns))
+    return
+
+
+def readings(ids: np.ndarray, seed: int, column: int, tenths: tuple) -> np.ndarray:
+    """
+    Draws one decimal readings for rows ids, some of them missing. Each block of
+    READING_BLOCK_ROWS rows has a generator of its own, seeded by its position.
+    """
+    values = np.empty(len(ids), dtype=np.int64)
+    missing = np.empty(len(ids), dtype=bool)
+    blocks = ids // READING_BLOCK_ROWS
+    for block in np.unique(blocks).tolist():
+        in_block = blocks == block
+        rng = np.random.default_rng([seed, column, block])
+        drawn = rng.integers(tenths[0], tenths[1] + 1, size=READING_BLOCK_ROWS)
+        gaps = rng.random(size=READING_BLOCK_ROWS) < MISSING_RATE
+        offsets = ids[in_block] % READING_BLOCK_ROWS
+        values[in_block] = drawn[offsets]
+        missing[in_block] = gaps[offsets]
+    labels = np.array([f'{value / 10:.1f}' for value in range(tenths[1] + 1)])
+    return np.where(missing, MISSING_VALUE, labels[values])
+
+
+def main() -> None:
+    """Generates a synthetic weather csv to benchmark with"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('data_file', help='csv file to write')
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--stations',
+        nargs='+',
+        help='station names the readings are spread over, the known ones by default'
+    )
+    args = parser.parse_args()
+    generate_data(
+        data_file=args.data_file,
+        rows=args.rows,
+        seed=args.seed,
+        stations=args.stations
+    )
+
+
+if __name__ == '__main__':
+    main()
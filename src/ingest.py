@@ -0,0 +1,704 @@
+import contextlib
+import copy
+import heapq
+import io
+import itertools
+import os
+import shutil
+import tempfile
+import numpy as np
+from project_config import (
+    SPLIT_DATA_FOLDER,
+    INGEST_PARTITION,
+    INGEST_RANGE_BYTES,
+    INGEST_WORKERS,
+    INGEST_LAYOUT,
+    MAX_FILE_LINE,
+    STAGE_SORT_ROWS,
+    TEMP_FOLDER,
+    VALUE_ZONE_MAP_COLS,
+    ZONE_MAP_COLS,
+    ZONE_TARGET_BYTES
+)
+from typing import Iterable, Iterator, List, Dict, Set, Tuple
+from process_pool import map_tasks
+from column_store import (
+    COLUMN_DTYPES,
+    column_path,
+    encode_values,
+    group_rows,
+    month_key,
+    minutes_to_months_since_epoch,
+    write_column
+)
+from tracing import TRACER
+from zone_planner import PARTITION_KEYS, ZonePlanner, partition_key
+from data_source import (
+    is_plain_file,
+    list_sources,
+    read_header,
+    read_lines,
+    source_size
+)
+from catalog import count_rows
+
+
+def get_columns(data_file: str) -> List:
+    """Gets header columns in file, the first file of a directory or glob"""
+    return read_header(data_source=data_file)
+
+
+@TRACER.traced('split_columns')
+def split_columns(
+    data_file: str,
+    zone_maps: Dict,
+    dictionaries: Dict[str, Dict[str, str]],
+    workers: int = INGEST_WORKERS,
+    layout: str = INGEST_LAYOUT,
+    partition: str = INGEST_PARTITION
+) -> Dict:
+    """
+    Splits the large csv into individual typed binary columns in their own files,
+    cutting zones as partition says. Codes of values new to dictionaries are
+    added to them in place. The files of a directory or glob, compressed or
+    not, are streamed in one pass with rows numbered on across them.
+    """
+    columns = get_columns(data_file=data_file)
+    recreate_folders(folders=[SPLIT_DATA_FOLDER])
+    if layout == 'station':
+        if workers > 1:
+            print('Only the arrival layout is split in parallel, streaming instead...')
+        zone_maps = split_columns_by_station(
+            data_file=data_file,
+            columns=columns,
+            zone_maps=zone_maps,
+            dictionaries=dictionaries,
+            partition=partition
+        )
+    elif workers > 1 and is_plain_file(data_source=data_file):
+        zone_maps = split_columns_parallel(
+            data_file=data_file,
+            columns=columns,
+            zone_maps=zone_maps,
+            dictionaries=dictionaries,
+            workers=workers,
+            partition=partition
+        )
+    else:
+        if workers > 1:
+            print('Only an uncompressed csv is split in parallel, streaming instead...')
+        with contextlib.closing(read_lines(paths=list_sources(data_file))) as lines:
+            zone_maps = ingest_lines(
+                lines=lines,
+                columns=columns,
+                zone_maps=zone_maps,
+                dictionaries=dictionaries,
+                partition=partition
+            )
+    # every row of the data file is read once and written to a zone
+    TRACER.count(
+        bytes_read=source_size(data_source=data_file),
+        rows_in=count_rows(zone_maps=zone_maps),
+        rows_out=count_rows(zone_maps=zone_maps),
+        zones_written=len(zone_maps['Timestamp'])
+    )
+    return zone_maps
+
+
+def split_columns_by_station(
+    data_file: str,
+    columns: List[str],
+    zone_maps: Dict,
+    dictionaries: Dict[str, Dict[str, str]],
+    partition: str = INGEST_PARTITION
+) -> Dict:
+    """
+    Splits the csv with its rows sorted by (station, timestamp). The rows of
+    each station are staged in the temp folder, then streamed one station at
+    a time so a location is a contiguous range of rows.
+    """
+    timestamp_idx = columns.index('Timestamp')
+    os.makedirs(TEMP_FOLDER, exist_ok=True)
+    staging_folder = tempfile.mkdtemp(prefix='ingest_', dir=TEMP_FOLDER)
+    codes, unsorted = stage_by_station(
+        data_file=data_file,
+        columns=columns,
+        dictionaries=dictionaries,
+        staging_folder=staging_folder
+    )
+    for code in codes:
+        path = f'{staging_folder}/{code}.csv'
+        with contextlib.ExitStack() as stack:
+            if code in unsorted:
+                lines = stack.enter_context(contextlib.closing(sort_staged(
+                    path=path,
+                    timestamp_idx=timestamp_idx,
+                    chunk_rows=STAGE_SORT_ROWS
+                )))
+            else:
+                lines = stack.enter_context(open(path, 'r'))
+            zone_maps = ingest_lines(
+                lines=lines,
+                columns=columns,
+                zone_maps=zone_maps,
+                dictionaries=dictionaries,
+                clustered=True,
+                partition=partition
+            )
+    shutil.rmtree(staging_folder)
+    return zone_maps
+
+
+def stage_by_station(
+    data_file: str,
+    columns: List[str],
+    dictionaries: Dict[str, Dict[str, str]],
+    staging_folder: str
+) -> Tuple[List[str], Set[str]]:
+    """
+    Writes the rows of each station to a csv of its own in staging_folder.
+    Returns the station codes in order, and the codes of the stations whose
+    rows did not arrive in timestamp order.
+    """
+    station_idx = columns.index('Station')
+    timestamp_idx = columns.index('Timestamp')
+    staged, last_timestamps, unsorted = {}, {}, set()
+    with contextlib.ExitStack() as stack:
+        lines = stack.enter_context(
+            contextlib.closing(read_lines(paths=list_sources(data_file)))
+        )
+        for line in lines:
+            content = line.rstrip().split(',')
+            if content == ['']:
+                continue
+            code = lookup_code(
+                dictionary=dictionaries['Station'],
+                value=content[station_idx]
+            )
+            if code not in staged:
+                path = f'{staging_folder}/{code}.csv'
+                staged[code] = stack.enter_context(open(path, 'w'))
+                TRACER.count(files_written=1)
+            timestamp = content[timestamp_idx]
+            if timestamp < last_timestamps.get(code, timestamp):
+                unsorted.add(code)
+            last_timestamps[code] = timestamp
+            staged[code].write(','.join(content) + '\n')
+    return sorted(staged, key=int), unsorted
+
+
+def sort_staged(path: str, timestamp_idx: int, chunk_rows: int) -> Iterator[str]:
+    """
+    Streams the lines of a staged csv sorted by timestamp, holding at most
+    chunk_rows of them in memory. Runs of chunk_rows lines are sorted and
+    written next to the csv, then merged. Both steps are stable, so rows of
+    the same timestamp keep their arrival order.
+    """
+    def timestamp(line: str) -> str:
+        return line.split(',')[timestamp_idx]
+
+    run_paths = []
+    with open(path, 'r') as f:
+        for run in iter(lambda: list(itertools.islice(f, chunk_rows)), []):
+            run_paths.append(f'{path}.{len(run_paths)}')
+            with open(run_paths[-1], 'w') as run_file:
+                run_file.writelines(sorted(run, key=timestamp))
+            TRACER.count(files_written=1)
+    with contextlib.ExitStack() as stack:
+        runs = [stack.enter_context(open(run_path, 'r')) for run_path in run_paths]
+        yield from heapq.merge(*runs, key=timestamp)
+
+
+def split_columns_parallel(
+    data_file: str,
+    columns: List[str],
+    zone_maps: Dict,
+    dictionaries: Dict[str, Dict[str, str]],
+    workers: int,
+    partition: str = INGEST_PARTITION
+) -> Dict:
+    """
+    Splits the csv with a process pool. Rows, their partition keys and the
+    values of dictionary columns are surveyed per newline aligned byte range,
+    zones are planned from the partition keys and the byte offset of the first
+    row of every zone is located, then each zone is encoded on its own and the
+    zone maps stitched in order.
+    """
+    ranges = byte_ranges(data_file=data_file, range_bytes=INGEST_RANGE_BYTES)
+    fields = {col: columns.index(col) for col in dictionaries if col in columns}
+    timestamp_idx = columns.index('Timestamp')
+    surveys = map_tasks(
+        func=survey_range,
+        tasks=[
+            (data_file, start, end, fields, timestamp_idx, partition)
+            for start, end in ranges
+        ],
+        workers=workers
+    )
+    counts = [count for count, _, _ in surveys]
+    # codes are given in order of first appearance, as in a sequential split
+    for _, distinct_values, _ in surveys:
+        for col, values in distinct_values.items():
+            for value in values:
+                lookup_code(dictionary=dictionaries[col], value=value)
+    planner = ZonePlanner(
+        limit=zone_row_limit(columns=columns, partition=partition),
+        whole=PARTITION_KEYS[partition] is not None
+    )
+    zone_sizes = [
+        size
+        for _, _, runs in surveys
+        for key, count in runs
+        for size in planner.add(key=key, count=count)
+    ] + planner.finish()
+    zone_rows = np.cumsum([0, *zone_sizes])[:-1]
+    first_rows = np.cumsum([0, *counts[:-1]]).tolist()
+    zone_offsets = map_tasks(
+        func=find_zone_offsets,
+        tasks=[
+            (data_file, start, end, first_row, zone_rows[
+                (zone_rows >= first_row) & (zone_rows < first_row + count)
+            ].tolist())
+            for (start, end), first_row, count in zip(ranges, first_rows, counts)
+        ],
+        workers=workers
+    )
+    zone_starts = [offset for offsets in zone_offsets for offset in offsets]
+    zone_ends = [*zone_starts[1:], os.path.getsize(data_file)]
+    results = map_tasks(
+        func=ingest_zone,
+        tasks=[
+            (data_file, zone, first_row, start, end, columns, dictionaries, partition)
+            for zone, (first_row, start, end) in enumerate(
+                zip(zone_rows.tolist(), zone_starts, zone_ends)
+            )
+        ],
+        workers=workers
+    )
+    for zone_map in results:
+        for col in zone_maps:
+            zone_maps[col].extend(zone_map[col])
+    return zone_maps
+
+
+def byte_ranges(data_file: str, range_bytes: int) -> List[Tuple[int, int]]:
+    """Cuts the rows after the header into newline aligned [start, end) byte ranges"""
+    size = os.path.getsize(data_file)
+    ranges = []
+    with open(data_file, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + range_bytes, size))
+            # move on to the start of the next line
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def line_starts(data_file: str, start: int, end: int) -> np.ndarray:
+    """Finds the byte offsets of the non-blank lines in a newline aligned range"""
+    with open(data_file, 'rb') as f:
+        f.seek(start)
+        data = np.frombuffer(f.read(end - start), dtype=np.uint8)
+    newlines = np.flatnonzero(data == ord('\n'))
+    starts = np.concatenate([[0], newlines + 1])
+    ends = np.concatenate([newlines, [len(data)]])
+    # a trailing carriage return does not make a line
+    lengths = ends - starts
+    has_return = lengths > 0
+    has_return[has_return] = data[ends[has_return] - 1] == ord('\r')
+    lengths -= has_return
+    return start + starts[lengths > 0]
+
+
+def survey_range(
+    task: Tuple[str, int, int, Dict[str, int], int, str]
+) -> Tuple[int, Dict[str, List[str]], List[Tuple[str, int]]]:
+    """
+    Counts the rows in a byte range, lists the distinct values of the given
+    fields in order of first appearance, and counts the rows of each run of
+    the same partition key
+    """
+    data_file, start, end, fields, timestamp_idx, partition = task
+    count = len(line_starts(data_file=data_file, start=start, end=end))
+    with open(data_file, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode().splitlines()
+    distinct_values = {}
+    for col, idx in fields.items():
+        values = (line.split(',')[idx].rstrip() for line in lines if line.strip())
+        distinct_values[col] = list(dict.fromkeys(values))
+    if PARTITION_KEYS[partition] is None:
+        return count, distinct_values, [(None, count)]
+    keys = (
+        partition_key(timestamp=line.split(',')[timestamp_idx], partition=partition)
+        for line in lines if line.strip()
+    )
+    runs = [(key, len(list(run))) for key, run in itertools.groupby(keys)]
+    return count, distinct_values, runs
+
+
+def find_zone_offsets(task: Tuple[str, int, int, int, List[int]]) -> List[int]:
+    """Finds the byte offsets of the rows in a range that open a new zone"""
+    data_file, start, end, first_row, zone_rows = task
+    starts = line_starts(data_file=data_file, start=start, end=end)
+    return starts[np.array(zone_rows, dtype=np.int64) - first_row].tolist()
+
+
+def ingest_zone(
+    task: Tuple[str, int, int, int, int, List[str], Dict, str]
+) -> Dict:
+    """Encodes the rows of one zone, found within [start, end) of the csv"""
+    data_file, zone, first_row, start, end, columns, dictionaries, partition = task
+    with open(data_file, 'rb') as f:
+        f.seek(start)
+        lines = io.StringIO(f.read(end - start).decode())
+    return ingest_lines(
+        lines=lines,
+        columns=columns,
+        zone_maps={col: [] for col in ZONE_MAP_COLS},
+        dictionaries=dictionaries,
+        first_row=first_row,
+        partition=partition,
+        first_zone=zone
+    )
+
+
+@TRACER.traced('append_columns')
+def append_columns(
+    data_file: str,
+    zone_maps: Dict,
+    dictionaries: Dict[str, Dict[str, str]],
+    offset: int = None,
+    partition: str = INGEST_PARTITION,
+    sources: List[str] = None
+) -> Dict:
+    """
+    Appends new rows to the split columns, cut into zones as partition says,
+    and updates zone_maps and dictionaries in place. Rows are read from byte
+    offset onwards if given, from the sources files of a directory or glob if
+    given, otherwise data_file is a delta csv with its own header line.
+    """
+    columns = get_columns(data_file=data_file)
+    zone_count = len(zone_maps['Timestamp'])
+    backup = copy.deepcopy(zone_maps)
+    dictionaries_backup = copy.deepcopy(dictionaries)
+    # the last zone is encoded again as rows are added to it
+    file_contents = {}
+    for path in zone_paths(columns=columns, zone=zone_count - 1):
+        with open(path, 'rb') as f:
+            file_contents[path] = f.read()
+    # appended rows must not be older than the stored rows or each other
+    last_date = backup['Timestamp'][-1]['max_date'] if zone_count else ''
+    with contextlib.ExitStack() as stack:
+        if offset is None:
+            paths = list_sources(data_file) if sources is None else sources
+            lines = stack.enter_context(contextlib.closing(read_lines(paths=paths)))
+        else:
+            raw = stack.enter_context(open(data_file, 'rb'))
+            raw.seek(offset)
+            lines = io.TextIOWrapper(raw)
+        try:
+            ingest_lines(
+                lines=lines,
+                columns=columns,
+                zone_maps=zone_maps,
+                dictionaries=dictionaries,
+                after_date=last_date,
+                partition=partition
+            )
+        except Exception:
+            # undo the partial append so the columns still match the catalog
+            for path, content in file_contents.items():
+                with open(path, 'wb') as f:
+                    f.write(content)
+            for zone in range(zone_count, len(zone_maps['Timestamp'])):
+                for path in zone_paths(columns=columns, zone=zone):
+                    if os.path.exists(path):
+                        os.remove(path)
+            for col in zone_maps:
+                zone_maps[col][:] = backup[col]
+            for col in dictionaries:
+                dictionaries[col].clear()
+                dictionaries[col].update(dictionaries_backup[col])
+            raise
+    return zone_maps
+
+
+def ingest_lines(
+    lines: Iterable[str],
+    columns: List[str],
+    zone_maps: Dict,
+    dictionaries: Dict[str, Dict[str, str]],
+    after_date: str = None,
+    first_row: int = None,
+    clustered: bool = False,
+    partition: str = INGEST_PARTITION,
+    first_zone: int = None
+) -> Dict:
+    """
+    Writes csv rows after the rows already in zone_maps, filling the last
+    zone while it has room before opening new zones, as planned by a
+    ZonePlanner. Rows and zones are numbered from first_row and first_zone
+    instead if given, which must open a zone. Zones only stay clustered if all
+    of their rows were written clustered. If after_date is given, rows must be
+    in timestamp order from after_date on, as month ranges of appended rows
+    are bounded by their first and last rows.
+    """
+    limit = zone_row_limit(columns=columns, partition=partition)
+    timestamp_idx = columns.index('Timestamp')
+    codes = [(idx, dictionaries[col]) for idx, col in enumerate(columns)
+             if col in dictionaries]
+    i = count_rows(zone_maps=zone_maps) if first_row is None else first_row
+    zone = len(zone_maps['Timestamp']) if first_zone is None else first_zone
+    held, key = 0, None
+    last_zone = zone_maps['Timestamp'][-1] if zone_maps['Timestamp'] else None
+    if first_row is None and last_zone is not None:
+        rows_in_last = last_zone['max_idx'] - last_zone['min_idx'] + 1
+        if rows_in_last < limit:
+            # continue the partially filled last zone
+            zone, held = zone - 1, rows_in_last
+            key = last_zone['partitions'][-1] if last_zone['partitions'] else None
+    planner = ZonePlanner(
+        limit=limit,
+        whole=PARTITION_KEYS[partition] is not None,
+        held=held,
+        key=key
+    )
+    pending = []
+    # the trailing None closes the last zone
+    for line in itertools.chain(lines, [None]):
+        if line is None:
+            sizes = planner.finish()
+        else:
+            content = line.rstrip().split(',')
+            if content == ['']:
+                continue
+            timestamp = content[timestamp_idx]
+            if after_date is not None:
+                if timestamp < after_date:
+                    raise ValueError(
+                        f'Row {i} at {timestamp} is older than the rows before it'
+                    )
+                after_date = timestamp
+            for idx, dictionary in codes:
+                content[idx] = lookup_code(dictionary=dictionary, value=content[idx])
+            pending.append(content)
+            i += 1
+            key = partition_key(timestamp=timestamp, partition=partition)
+            sizes = planner.add(key=key)
+        for size in sizes:
+            rows = pending[:size - held]
+            del pending[:size - held]
+            if rows:
+                write_zone(
+                    zone=zone,
+                    columns=columns,
+                    rows=rows,
+                    zone_maps=zone_maps,
+                    first_idx=i - len(pending) - len(rows),
+                    continued=held > 0,
+                    clustered=clustered,
+                    partition=partition
+                )
+            zone, held = zone + 1, 0
+    return zone_maps
+
+
+def zone_row_limit(columns: List[str], partition: str) -> int:
+    """
+    Gets the most rows a zone holds, MAX_FILE_LINE for row partitioned zones
+    and as many rows as fit in ZONE_TARGET_BYTES of typed columns otherwise
+    """
+    if PARTITION_KEYS[partition] is None:
+        return MAX_FILE_LINE
+    row_bytes = sum(
+        np.dtype(COLUMN_DTYPES[col]).itemsize for col in columns if col in COLUMN_DTYPES
+    )
+    return max(ZONE_TARGET_BYTES // row_bytes, 1)
+
+
+def write_zone(
+    zone: int,
+    columns: List[str],
+    rows: List[List[str]],
+    zone_maps: Dict,
+    first_idx: int,
+    continued: bool,
+    clustered: bool,
+    partition: str
+) -> None:
+    """Writes rows from row first_idx on to a new zone, or the last one if continued"""
+    if continued:
+        # its entries are updated in place
+        min_max_dict = {col: zone_maps[col][-1] for col in zone_maps}
+    else:
+        zone_maps, min_max_dict = open_zone_map(min_idx=first_idx, zone_maps=zone_maps)
+    set_clustered(min_max_dict=min_max_dict, clustered=clustered)
+    buffers = [list(values) for values in zip(*rows)]
+    timestamps = buffers[columns.index('Timestamp')]
+    entry = min_max_dict['Timestamp']
+    entry['min_date'] = min(entry['min_date'], min(timestamps))
+    entry['max_date'] = max(entry['max_date'], max(timestamps))
+    key_length = PARTITION_KEYS[partition]
+    if key_length is not None:
+        entry['partitions'] = sorted({
+            *entry['partitions'],
+            *(timestamp[:key_length] for timestamp in timestamps)
+        })
+    flush_zone(
+        zone=zone,
+        columns=columns,
+        buffers=buffers,
+        min_max_dict=min_max_dict,
+        max_idx=first_idx + len(rows) - 1
+    )
+    return
+
+
+def lookup_code(dictionary: Dict[str, str], value: str) -> str:
+    """Gets the code of a value, giving it the next free code if it is new"""
+    if value not in dictionary:
+        dictionary[value] = str(len(dictionary))
+    return dictionary[value]
+
+
+def set_clustered(min_max_dict: Dict, clustered: bool) -> None:
+    """Marks a zone as holding the rows of each station contiguously, by timestamp"""
+    if 'Station' in min_max_dict:
+        entry = min_max_dict['Station']
+        entry['clustered'] = entry['clustered'] and clustered
+    return
+
+
+def flush_zone(
+    zone: int,
+    columns: List[str],
+    buffers: List[List[str]],
+    min_max_dict: Dict,
+    max_idx: int
+) -> None:
+    """Closes off the zone map entries of a zone and appends its buffered values"""
+    for col in min_max_dict:
+        min_max_dict[col]['max_idx'] = max_idx
+    encoded = {
+        col: encode_values(col=col, values=buffer)
+        for col, buffer in zip(columns, buffers)
+    }
+    for col, values in encoded.items():
+        if col in min_max_dict:
+            update_zone_stats(
+                col=col,
+                values=values,
+                min_max_dict=min_max_dict[col],
+                first_idx=max_idx - len(values) + 1,
+                stations=encoded.get('Station')
+            )
+        write_column(col=col, zone=zone, values=values)
+    return
+
+
+def zone_paths(columns: List[str], zone: int) -> List[str]:
+    if zone < 0:
+        return []
+    return [column_path(col=col, zone=zone) for col in columns]
+
+
+def recreate_folders(folders: List[str]) -> None:
+    for folder in folders:
+        if os.path.exists(folder) and os.path.isdir(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+    return
+
+
+def initialize_min_max_dict(zone_maps: Dict) -> Dict:
+    """Initialize the dictionary that stores the min and max for each col zone"""
+    min_date_str = '9999-01-01 00:00'
+    max_date_str = '0001-01-01 00:00'
+    min_max_dict = {
+        col: {
+            'min_idx': float('inf'),
+            'max_idx': -float('inf')
+        }
+        for col in zone_maps
+    }
+    if 'Timestamp' in zone_maps:
+        min_max_dict['Timestamp']['min_date'] = min_date_str
+        min_max_dict['Timestamp']['max_date'] = max_date_str
+        # global [start_row, end_row) of every 'YYYY-MM' of each station code
+        # in the zone
+        min_max_dict['Timestamp']['months'] = {}
+        # sorted keys of the year or month partitions with rows in the zone,
+        # empty for row partitioned zones
+        min_max_dict['Timestamp']['partitions'] = []
+    if 'Station' in zone_maps:
+        # number of rows of each station code in the zone
+        min_max_dict['Station']['stations'] = {}
+        # whether the rows of each station are contiguous and sorted by timestamp
+        min_max_dict['Station']['clustered'] = True
+    for col in VALUE_ZONE_MAP_COLS:
+        if col in zone_maps:
+            min_max_dict[col]['min_value'] = None
+            min_max_dict[col]['max_value'] = None
+            min_max_dict[col]['missing'] = 0
+
+    return min_max_dict
+
+
+def update_zone_stats(
+    col: str,
+    values: np.ndarray,
+    min_max_dict: Dict,
+    first_idx: int,
+    stations: np.ndarray = None
+) -> None:
+    """
+    Adds the values written to a zone, starting at row first_idx, to the
+    statistics in its zone map entry. Month ranges are kept per station of
+    the matching rows of stations.
+    """
+    if col == 'Timestamp':
+        month_groups, order, starts, counts = group_rows(
+            stations=stations,
+            labels=minutes_to_months_since_epoch(minutes=values)
+        ) if len(values) else ([], None, [], [])
+        for (station, label), run_start, count in zip(month_groups, starts, counts):
+            months = min_max_dict['months'].setdefault(str(station), {})
+            month = month_key(label=label)
+            # rows of a group are in arrival order, its first and last rows bound it
+            start = first_idx + int(order[run_start])
+            end = first_idx + int(order[run_start + count - 1]) + 1
+            if month in months:
+                start, end = min(start, months[month][0]), max(end, months[month][1])
+            months[month] = [start, end]
+    if col == 'Station':
+        stations = min_max_dict['stations']
+        codes, counts = np.unique(values, return_counts=True)
+        for code, count in zip(codes, counts):
+            stations[str(code)] = stations.get(str(code), 0) + int(count)
+    if col in VALUE_ZONE_MAP_COLS:
+        missing = np.isnan(values)
+        min_max_dict['missing'] += int(missing.sum())
+        present = values[~missing]
+        if not present.size:
+            return
+        min_value, max_value = float(present.min()), float(present.max())
+        if min_max_dict['min_value'] is not None:
+            min_value = min(min_value, min_max_dict['min_value'])
+            max_value = max(max_value, min_max_dict['max_value'])
+        min_max_dict['min_value'] = min_value
+        min_max_dict['max_value'] = max_value
+    return
+
+
+def open_zone_map(min_idx: int, zone_maps: Dict) -> Tuple[Dict, Dict]:
+    """Adds the zone map entries of a new zone starting at row min_idx"""
+    min_max_dict = initialize_min_max_dict(zone_maps=zone_maps)
+    for col in zone_maps:
+        min_max_dict[col]['min_idx'] = min_idx
+        zone_maps[col].append(min_max_dict[col])
+    return zone_maps, min_max_dict
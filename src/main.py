@@ -1,150 +1,459 @@
+import argparse
+import copy
 import os
-import shutil
+import re
 from project_config import (
     SPLIT_DATA_FOLDER,
     DATA_FILE,
-    TEMP_FOLDER,
-    ARCHIVE_FOLDER,
-    MAX_FILE_LINE,
+    INGEST_LAYOUT,
+    INGEST_PARTITION,
+    INGEST_WORKERS,
     MAPPER,
+    QUERY_MEMORY_BUDGET,
+    QUERY_WORKERS,
     ZONE_MAP_COLS
 )
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from Processor import Processor
+from ingest import append_columns, get_columns, split_columns
+from column_cache import COLUMN_CACHE
+from monthly_summary import build_summary
+from tracing import TRACER, Span, format_report
+from zone_planner import PARTITION_KEYS
+from data_source import source_size
+from catalog import (
+    is_appended,
+    is_current,
+    is_prefix,
+    load_catalog,
+    new_sources,
+    save_catalog,
+    source_key
+)
+
+# query names become part of the result file name, ScanResult_{name}.csv
+QUERY_NAME = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.-]*')
 
 
-def get_columns(data_file: str) -> List:
-    """Gets header columns in file"""
-    return open(data_file, 'r').readline().rstrip().split(',')
+def process_data(
+    required_years: str,
+    location: str,
+    zone_maps: Dict,
+    matric_num: str,
+    workers: int = QUERY_WORKERS,
+    memory_budget: int = QUERY_MEMORY_BUDGET,
+    stations: Dict[str, str] = None,
+    summary: Dict[str, Dict] = None
+) -> None:
+    """
+    Uses required years and location to churn out a resulting csv, looked up
+    in the monthly summary if given instead of scanning the columns
+    """
+    print('Processing data...')
+    with TRACER.span('query', matric_num=matric_num) as span:
+        processor = Processor(
+            required_years=required_years,
+            location=location,
+            zone_maps=zone_maps,
+            workers=workers,
+            memory_budget=memory_budget,
+            stations=stations
+        )
+        processor.process_month_and_year()
+        if summary is not None:
+            processor.summarize_months(summary=summary)
+            processor.write_query_results(
+                matric_num=matric_num,
+                required_years=required_years,
+                location=location
+            )
+        else:
+            processor.process_location()
+            # getting results here
+            processor.process_temperature_and_humidity(matric_num)
+    if summary is None:
+        report_column_cache()
+    report_trace(span=span)
 
 
-def split_columns(data_file: str, zone_maps: Dict) -> None:
-    """Splits the large csv into individual columns in their own files"""
-    columns = get_columns(data_file=data_file)
-    recreate_folders(folders=[SPLIT_DATA_FOLDER])
-    opened_files = []
-    with open(data_file, 'r') as f:
-        next(f)
-        min_max_dict = initialize_min_max_dict(zone_maps=zone_maps)
-        curr_zone = 0
-        i = 0
-        for line in f:
-            if i % MAX_FILE_LINE == MAX_FILE_LINE - 1:
-                for col in min_max_dict:
-                    min_max_dict[col]['max_idx'] = i
-            if i % MAX_FILE_LINE == 0:
-                if opened_files:
-                    # store in map and reset min_max_dict
-                    zone_maps, min_max_dict = store_in_zone_map(
-                        min_max_dict=min_max_dict,
-                        zone_maps=zone_maps
-                    )
-                    close_files(opened_files=opened_files)
-                for col in min_max_dict:
-                    min_max_dict[col]['min_idx'] = i
-                opened_files = [
-                    open(f'{SPLIT_DATA_FOLDER}/{col}_{curr_zone}.txt', 'w')
-                    for col in columns
-                ]
-                curr_zone += 1
-            content = line.rstrip().split(',')
-            for file, c, col in zip(opened_files, content, columns):
-                if col in MAPPER:
-                    c = MAPPER[col][c]
-                if col == 'Timestamp':
-                    min_date = min_max_dict[col]['min_date']
-                    max_date = min_max_dict[col]['max_date']
-                    min_max_dict[col]['min_date'] = min(min_date, c)
-                    min_max_dict[col]['max_date'] = max(max_date, c)
-                file.write(f'{c}\n')
-            i += 1
-    for col in min_max_dict:
-        min_max_dict[col]['max_idx'] = i - 1
-    zone_maps, min_max_dict = store_in_zone_map(
-        min_max_dict=min_max_dict,
-        zone_maps=zone_maps
+def report_column_cache() -> None:
+    stats = COLUMN_CACHE.stats()
+    print(
+        f'Column cache: {stats["hits"]} hits, {stats["misses"]} misses, '
+        f'{stats["bytes"] / (1024 * 1024):.1f} MB in {stats["chunks"]} chunks'
     )
-    close_files(opened_files=opened_files)
-    return zone_maps
 
 
-def recreate_folders(folders: List[str]) -> None:
-    for folder in folders:
-        if os.path.exists(folder) and os.path.isdir(folder):
-            shutil.rmtree(folder)
-        os.makedirs(folder)
+def report_trace(span: Optional[Span]) -> None:
+    """Prints the time and counters of every stage of a traced query"""
+    if span is not None:
+        print('\n'.join(format_report(report=span.report())))
     return
 
 
-def initialize_min_max_dict(zone_maps: Dict) -> Dict:
-    """Initialize the dictionary that stores the min and max for each col zone"""
-    min_date_str = '9999-01-01 00:00'
-    max_date_str = '0001-01-01 00:00'
-    min_max_dict = {
-        col: {
-            'min_idx': float('inf'),
-            'max_idx': -float('inf')
-        }
-        for col in zone_maps
-    }
-    if 'Timestamp' in zone_maps:
-        min_max_dict['Timestamp']['min_date'] = min_date_str
-        min_max_dict['Timestamp']['max_date'] = max_date_str
-
-    return min_max_dict
+def process_batch(
+    queries: List[Tuple[str, int, str]],
+    zone_maps: Dict,
+    workers: int = QUERY_WORKERS,
+    memory_budget: int = QUERY_MEMORY_BUDGET,
+    stations: Dict[str, str] = None,
+    summary: Dict[str, Dict] = None
+) -> None:
+    """
+    Answers many (name, required years, location) queries with one shared scan
+    of the columns, or from the monthly summary if given, and writes a
+    resulting csv for each of them
+    """
+    print(f'Processing {len(queries)} queries...')
+    with TRACER.span('batch', queries=len(queries)) as span:
+        processor = Processor(
+            required_years=None,
+            location=None,
+            zone_maps=zone_maps,
+            workers=workers,
+            memory_budget=memory_budget,
+            stations=stations,
+            queries=sorted({
+                (required_years, location) for _, required_years, location in queries
+            })
+        )
+        processor.process_month_and_year()
+        if summary is not None:
+            processor.summarize_months(summary=summary)
+        else:
+            processor.process_location()
+            processor.aggregate_months()
+        for name, required_years, location in queries:
+            processor.write_query_results(
+                matric_num=name,
+                required_years=required_years,
+                location=location
+            )
+    # the summary is answered without reading any column
+    if summary is None:
+        report_column_cache()
+    report_trace(span=span)
 
 
-def store_in_zone_map(
-    min_max_dict: Dict,
-    zone_maps: Dict
-) -> Tuple[Dict, Dict]:
-    """Store the current min and max in the zone map and reinitialize the min and max"""
-    for col in zone_maps:
-        zone_maps[col].append(min_max_dict[col])
-    min_max_dict = initialize_min_max_dict(zone_maps=zone_maps)
-    return zone_maps, min_max_dict
+def parse_matric_num(matric_num: str) -> Tuple[int, str]:
+    """Gets the required years and location a matriculation number asks for"""
+    if len(matric_num) != 9:
+        raise ValueError('Invalid input, matriculation number is of length 9...')
+    check_query_name(name=matric_num)
+    try:
+        required_years, location = int(matric_num[-2]), int(matric_num[-3])
+    except ValueError:
+        raise ValueError('Invalid input, please try again...')
+    location = '1' if location % 2 else '0'
+    return required_years, location
 
 
-def close_files(opened_files: List) -> None:
-    for file in opened_files:
-        file.close()
+def check_query_name(name: str) -> None:
+    """Checks a query name can name its result csv, without leaving RESULTS_FOLDER"""
+    if not QUERY_NAME.fullmatch(name):
+        raise ValueError(
+            f'Invalid name {name}, only letters, digits, _, - and . are allowed...'
+        )
     return
 
 
-def process_data(
-    required_years: str,
-    location: str,
-    zone_maps: Dict,
-    matric_num: str
-) -> None:
-    """Uses required years and location to churn out a resulting csv"""
-    folders = [TEMP_FOLDER, ARCHIVE_FOLDER]
-    recreate_folders(folders=folders)
-    print('Processing data...')
-    processor = Processor(
-        required_years=required_years,
-        location=location,
-        zone_maps=zone_maps
+def read_batch_file(
+    batch_file: str,
+    stations: Dict[str, str] = MAPPER['Station']
+) -> List[Tuple[str, int, str]]:
+    """
+    Reads one query per line, either a matriculation number or a query spec
+    written as name,required years digit,station
+    """
+    queries = []
+    with open(batch_file, 'r') as f:
+        for line_num, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                if ',' not in line:
+                    queries.append((line, *parse_matric_num(matric_num=line)))
+                    continue
+                fields = line.split(',')
+                if len(fields) != 3:
+                    raise ValueError(f'Invalid query spec {line}')
+                name, required_years, station = fields
+                if station not in stations or not re.fullmatch('[0-9]', required_years):
+                    raise ValueError(f'Invalid query spec {line}')
+                check_query_name(name=name)
+                queries.append((name, int(required_years), stations[station]))
+            except ValueError as e:
+                raise ValueError(f'{batch_file} line {line_num}: {e}')
+    return queries
+
+
+def load_column_store(
+    data_file: str,
+    ingest_workers: int = INGEST_WORKERS,
+    layout: str = None,
+    partition: str = None
+) -> Dict:
+    """
+    Reuses the split columns when possible, appending new rows or re-splitting.
+    The layout and the partitioning of the saved columns are kept unless
+    others are asked for. Rows that cannot be appended, such as late readings,
+    make the data file split again, and the delta csvs appended before are
+    appended again after a split.
+    """
+    catalog = load_catalog()
+    columns = get_columns(data_file=data_file)
+    recorded_deltas = catalog['deltas'] if catalog is not None else []
+    if layout is None:
+        layout = catalog['layout'] if catalog is not None else INGEST_LAYOUT
+    if partition is None:
+        partition = catalog['partition'] if catalog is not None else INGEST_PARTITION
+    if catalog is not None and catalog['layout'] != layout:
+        catalog = None
+    if catalog is not None and catalog['partition'] != partition:
+        catalog = None
+    if catalog is not None and is_current(catalog=catalog, data_file=data_file):
+        print(f'Reusing split columns in {SPLIT_DATA_FOLDER}')
+        return catalog
+    # after a delta csv was appended, the columns no longer mirror a prefix of the file
+    can_append = catalog is not None and not catalog['deltas']
+    is_appendable = can_append and is_prefix(catalog=catalog, data_file=data_file)
+    # files added to a directory or glob since are appended together
+    sources = new_sources(catalog=catalog, data_file=data_file) if can_append else []
+    zone_maps = None
+    if is_appendable or sources:
+        print('Appending new rows of the data file...')
+        dictionaries = catalog['dictionaries']
+        first_zone = max(len(catalog['zone_maps']['Timestamp']) - 1, 0)
+        try:
+            zone_maps = append_columns(
+                data_file=data_file,
+                zone_maps=catalog['zone_maps'],
+                dictionaries=dictionaries,
+                offset=catalog['source']['size'] if is_appendable else None,
+                partition=partition,
+                sources=sources or None
+            )
+        except ValueError as e:
+            # the partial append was undone, the columns still match the catalog
+            print(f'Cannot append the new rows: {e}')
+        else:
+            summary = build_summary(
+                zone_maps=zone_maps,
+                summary=catalog['summary'],
+                first_zone=first_zone
+            )
+            deltas = catalog['deltas']
+    if zone_maps is None:
+        print('Splitting the data file...')
+        zone_maps = {
+            col: []
+            for col in ZONE_MAP_COLS
+        }
+        # known stations keep their codes, new ones are added as they are found
+        dictionaries = copy.deepcopy(MAPPER)
+        zone_maps = split_columns(
+            data_file=data_file,
+            zone_maps=zone_maps,
+            dictionaries=dictionaries,
+            workers=ingest_workers,
+            layout=layout,
+            partition=partition
+        )
+        summary = build_summary(zone_maps=zone_maps)
+        deltas = []
+    catalog = save_catalog(
+        data_file=data_file,
+        columns=columns,
+        zone_maps=zone_maps,
+        deltas=deltas,
+        dictionaries=dictionaries,
+        layout=layout,
+        partition=partition,
+        summary=summary
+    )
+    if not deltas:
+        catalog = reapply_deltas(
+            catalog=catalog,
+            data_file=data_file,
+            deltas=recorded_deltas
+        )
+    return catalog
+
+
+def append_delta_files(catalog: Dict, data_file: str, delta_files: List[str]) -> Dict:
+    """Appends delta csvs in turn, leaving out the ones that cannot be appended"""
+    for delta_file in delta_files:
+        try:
+            catalog = append_delta_file(
+                catalog=catalog,
+                data_file=data_file,
+                delta_file=delta_file
+            )
+        except ValueError as e:
+            print(f'Cannot append {delta_file}: {e}')
+    return catalog
+
+
+def reapply_deltas(catalog: Dict, data_file: str, deltas: List[Dict]) -> Dict:
+    """
+    Appends the delta csvs of a previous catalog to freshly split columns, and
+    warns about the ones that were changed, removed or no longer fit
+    """
+    for delta in deltas:
+        path = delta.get('path')
+        if path is None or not os.path.isfile(path) or not is_appended(
+            catalog={'deltas': [delta]},
+            delta_file=path
+        ):
+            print(f'Warning: dropped the rows of {path or "a delta csv"}, '
+                  'it changed or was removed since it was appended')
+            continue
+        try:
+            catalog = append_delta_file(
+                catalog=catalog,
+                data_file=data_file,
+                delta_file=path
+            )
+        except ValueError as e:
+            print(f'Warning: dropped the rows of {path}: {e}')
+    return catalog
+
+
+def append_delta_file(catalog: Dict, data_file: str, delta_file: str) -> Dict:
+    """Appends the rows of a delta csv to the split columns"""
+    if is_appended(catalog=catalog, delta_file=delta_file):
+        print(f'{delta_file} was already appended, skipping...')
+        return catalog
+    print(f'Appending {delta_file}...')
+    first_zone = max(len(catalog['zone_maps']['Timestamp']) - 1, 0)
+    zone_maps = append_columns(
+        data_file=delta_file,
+        zone_maps=catalog['zone_maps'],
+        dictionaries=catalog['dictionaries'],
+        partition=catalog['partition']
+    )
+    return save_catalog(
+        data_file=data_file,
+        columns=list(catalog['columns']),
+        zone_maps=zone_maps,
+        deltas=catalog['deltas'] + [
+            {'path': os.path.abspath(delta_file), **source_key(data_file=delta_file)}
+        ],
+        dictionaries=catalog['dictionaries'],
+        layout=catalog['layout'],
+        partition=catalog['partition'],
+        summary=build_summary(
+            zone_maps=zone_maps,
+            summary=catalog['summary'],
+            first_zone=first_zone
+        )
     )
-    processor.process_month_and_year()
-    processor.process_location()
-    processor.process_temperature_and_humidity(matric_num)  # getting results here
 
 
 def main() -> None:
     """Main interface with user"""
-    print(f'Data file used: {DATA_FILE}')
-    print(f'File Size is {os.stat(DATA_FILE).st_size / (1024 * 1024)} MB')
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        '--append',
+        nargs='*',
+        default=[],
+        metavar='DELTA_FILE',
+        help='csv files of new readings to append to the split columns'
+    )
+    parser.add_argument(
+        '--batch',
+        metavar='BATCH_FILE',
+        help='file of matriculation numbers or query specs to answer in one scan'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=QUERY_WORKERS,
+        help='number of processes each query is fanned out to'
+    )
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        default=QUERY_MEMORY_BUDGET,
+        help='bytes of intermediate row ids a query keeps in memory before spilling'
+    )
+    parser.add_argument(
+        '--ingest-workers',
+        type=int,
+        default=INGEST_WORKERS,
+        help='number of processes the data file is split into columns with'
+    )
+    parser.add_argument(
+        '--layout',
+        choices=['arrival', 'station'],
+        help='row order of the split columns, the saved layout is kept by default'
+    )
+    parser.add_argument(
+        '--partition',
+        choices=list(PARTITION_KEYS),
+        help='cut zones every MAX_FILE_LINE rows or at year or month boundaries, '
+             'the saved partitioning is kept by default'
+    )
+    parser.add_argument(
+        '--scan',
+        action='store_true',
+        help='scan the columns instead of looking queries up in the monthly summary'
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='TRACE_FILE',
+        help='time every stage, print a report of each query and write a Chrome trace'
+    )
+    parser.add_argument(
+        '--data-file',
+        default=DATA_FILE,
+        help='csv file, or directory or glob of .csv, .csv.gz and .csv.xz files, '
+             'to split into columns'
+    )
+    args = parser.parse_args()
+    TRACER.enabled = bool(args.trace)
 
-    line_count = sum(1 for _ in open(DATA_FILE, 'r'))
-    print(f'Number of Lines in the file is {line_count}')
+    print(f'Data file used: {args.data_file}')
+    print(f'File Size is {source_size(data_source=args.data_file) / (1024 * 1024)} MB')
 
-    zone_maps = {
-        col: []
-        for col in ZONE_MAP_COLS
-    }
+    with TRACER.span('load_column_store') as span:
+        catalog = load_column_store(
+            data_file=args.data_file,
+            ingest_workers=args.ingest_workers,
+            layout=args.layout,
+            partition=args.partition
+        )
+        catalog = append_delta_files(
+            catalog=catalog,
+            data_file=args.data_file,
+            delta_files=args.append
+        )
+    report_trace(span=span)
+    if args.trace:
+        TRACER.write_trace(trace_file=args.trace)
+    zone_maps = catalog['zone_maps']
+    stations = catalog['dictionaries']['Station']
+    summary = None if args.scan else catalog['summary']
+    # the row count excludes the header line
+    print(f'Number of Lines in the file is {catalog["row_count"] + 1}')
 
-    zone_maps = split_columns(data_file=DATA_FILE, zone_maps=zone_maps)
+    if args.batch:
+        try:
+            queries = read_batch_file(batch_file=args.batch, stations=stations)
+        except ValueError as e:
+            parser.error(str(e))
+        process_batch(
+            queries=queries,
+            zone_maps=zone_maps,
+            workers=args.workers,
+            memory_budget=args.memory_budget,
+            stations=stations,
+            summary=summary
+        )
+        if args.trace:
+            TRACER.write_trace(trace_file=args.trace)
+        return
 
     while True:
         print()
@@ -154,20 +463,22 @@ def main() -> None:
             print('Have a good day, bye bye...')
             break
         try:
-            if len(matric_num) != 9:
-                print('Invalid input, matriculation number is of length 9...')
-                continue
-            required_years, location = int(matric_num[-2]), int(matric_num[-3])
-        except ValueError:
-            print('Invalid input, please try again...')
+            required_years, location = parse_matric_num(matric_num=matric_num)
+        except ValueError as e:
+            print(e)
             continue
-        location = '1' if location % 2 else '0'
         process_data(
             required_years=required_years,
             location=location,
             zone_maps=zone_maps,
-            matric_num=matric_num
+            matric_num=matric_num,
+            workers=args.workers,
+            memory_budget=args.memory_budget,
+            stations=stations,
+            summary=summary
         )
+        if args.trace:
+            TRACER.write_trace(trace_file=args.trace)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,140 @@
+from project_config import VALUE_ZONE_MAP_COLS
+from typing import Dict, List, Set
+from column_store import (
+    group_rows,
+    minutes_to_months_since_epoch,
+    month_key,
+    read_column,
+    reduce_runs
+)
+from tracing import TRACER
+import numpy as np
+
+# minutes in a day, stored timestamps are floor divided by it into days
+MINUTES_PER_DAY = 24 * 60
+
+
+def cell_key(location: str, year: int, month: int) -> str:
+    return f'{location}/{year:04d}-{month:02d}'
+
+
+def summarize_zone(zone: int) -> Dict[str, Dict]:
+    """
+    Aggregates the readings of every (station, month) in one zone into summary
+    cells of counts, sums, and min and max values with the dates they occur on
+    """
+    minutes = read_column(col='Timestamp', zone=zone)
+    if not len(minutes):
+        return {}
+    month_groups, order, starts, counts = group_rows(
+        stations=read_column(col='Station', zone=zone),
+        labels=minutes_to_months_since_epoch(minutes=minutes)
+    )
+    groups = np.repeat(np.arange(len(starts)), counts)
+    days = minutes[order] // MINUTES_PER_DAY
+    cells = {
+        f'{station}/{month_key(label=label)}': {} for station, label in month_groups
+    }
+    names = list(cells)
+    for col in VALUE_ZONE_MAP_COLS:
+        values = read_column(col=col, zone=zone)[order]
+        reduced = reduce_runs(values=values, starts=starts)
+        present, sums = reduced['count'], reduced['sum']
+        stats = {stat: reduced[stat] for stat in ('min', 'max')}
+        dates = {
+            stat: group_dates(
+                groups=groups,
+                days=days,
+                ties=values == np.repeat(stat_values, counts)
+            )
+            for stat, stat_values in stats.items()
+        }
+        for i, name in enumerate(names):
+            has_readings = bool(present[i])
+            cells[name][col] = {
+                'count': int(present[i]),
+                'sum': float(sums[i]),
+                # float32 readings are kept as the shortest decimal that restores them
+                'min': float(str(stats['min'][i])) if has_readings else None,
+                'min_dates': sorted(dates['min'].get(i, ())),
+                'max': float(str(stats['max'][i])) if has_readings else None,
+                'max_dates': sorted(dates['max'].get(i, ()))
+            }
+    return cells
+
+
+def group_dates(
+    groups: np.ndarray,
+    days: np.ndarray,
+    ties: np.ndarray
+) -> Dict[int, Set[str]]:
+    """Collects the dates of the rows flagged by ties, per group"""
+    pairs = np.unique(np.stack([groups[ties], days[ties]], axis=1), axis=0)
+    dates = {}
+    for group, day in pairs.tolist():
+        dates.setdefault(group, set()).add(str(np.datetime64(day, 'D')))
+    return dates
+
+
+def merge_cells(cell: Dict, other: Dict) -> Dict:
+    """Combines the summaries of the same (station, month) from two zones"""
+    merged = {}
+    for col, col_cell in cell.items():
+        other_cell = other[col]
+        merged_cell = {
+            'count': col_cell['count'] + other_cell['count'],
+            'sum': col_cell['sum'] + other_cell['sum']
+        }
+        for stat, pick in (('min', min), ('max', max)):
+            values = [
+                c[stat] for c in (col_cell, other_cell) if c[stat] is not None
+            ]
+            best = pick(values) if values else None
+            merged_cell[stat] = best
+            merged_cell[f'{stat}_dates'] = sorted({
+                date
+                for c in (col_cell, other_cell) if c[stat] == best
+                for date in c[f'{stat}_dates']
+            })
+        merged[col] = merged_cell
+    return merged
+
+
+@TRACER.traced('build_summary')
+def build_summary(
+    zone_maps: Dict[str, List[Dict]],
+    summary: Dict[str, Dict] = None,
+    first_zone: int = 0
+) -> Dict[str, Dict]:
+    """
+    Builds the monthly summary of every station from the split columns. If
+    first_zone is given, only the cells of months with rows from first_zone
+    onwards are built again, from every zone holding rows of them.
+    """
+    timestamp_zones = zone_maps['Timestamp']
+    if not first_zone or summary is None:
+        summary, stale, zones = {}, None, range(len(timestamp_zones))
+    else:
+        stale = set(zone_cell_keys(entries=timestamp_zones[first_zone:]))
+        for key in stale:
+            summary.pop(key, None)
+        zones = [
+            zone for zone, entry in enumerate(timestamp_zones)
+            if not stale.isdisjoint(zone_cell_keys(entries=[entry]))
+        ]
+    for zone in zones:
+        for key, cell in summarize_zone(zone=zone).items():
+            if stale is not None and key not in stale:
+                continue
+            summary[key] = merge_cells(summary[key], cell) if key in summary else cell
+    return summary
+
+
+def zone_cell_keys(entries: List[Dict]) -> List[str]:
+    """Lists the summary cells the Timestamp zone map entries hold rows of"""
+    return [
+        f'{location}/{month}'
+        for entry in entries
+        for location, months in entry['months'].items()
+        for month in months
+    ]
@@ -0,0 +1,69 @@
+from project_config import TEMP_FOLDER, QUERY_MEMORY_BUDGET
+from typing import Dict, Hashable, List
+from tracing import TRACER
+import os
+import shutil
+import tempfile
+import numpy as np
+
+
+class PositionStore:
+    """
+    Holds the row ids passed between Processor stages in memory, spilling
+    arrays to disk once the memory budget is exceeded. Spilled arrays go to
+    a workspace folder of their own, so concurrent queries never share files.
+    """
+    def __init__(
+        self,
+        memory_budget: int = QUERY_MEMORY_BUDGET,
+        spill_folder: str = TEMP_FOLDER
+    ) -> None:
+        self.memory_budget = memory_budget
+        self.spill_folder = spill_folder
+        self.in_memory: Dict[Hashable, np.ndarray] = {}
+        self.spilled: Dict[Hashable, str] = {}
+        self.workspace = None
+        self.nbytes = 0
+
+    def put(self, key: Hashable, positions: np.ndarray) -> None:
+        self.remove(key=key)
+        positions = np.asarray(positions, dtype=np.int64)
+        if self.nbytes + positions.nbytes <= self.memory_budget:
+            self.in_memory[key] = positions
+            self.nbytes += positions.nbytes
+            return
+        if self.workspace is None:
+            os.makedirs(self.spill_folder, exist_ok=True)
+            self.workspace = tempfile.mkdtemp(
+                prefix='positions_',
+                dir=self.spill_folder
+            )
+        name = '_'.join(map(str, key)) if isinstance(key, tuple) else str(key)
+        path = f'{self.workspace}/{name}.npy'
+        np.save(path, positions)
+        self.spilled[key] = path
+        TRACER.count(files_written=1)
+        return
+
+    def get(self, key: Hashable) -> np.ndarray:
+        if key in self.in_memory:
+            return self.in_memory[key]
+        return np.load(self.spilled[key], mmap_mode='r')
+
+    def keys(self) -> List[Hashable]:
+        return sorted([*self.in_memory, *self.spilled])
+
+    def remove(self, key: Hashable) -> None:
+        if key in self.in_memory:
+            self.nbytes -= self.in_memory.pop(key).nbytes
+        if key in self.spilled:
+            os.remove(self.spilled.pop(key))
+        return
+
+    def clear(self) -> None:
+        for key in self.keys():
+            self.remove(key=key)
+        if self.workspace is not None:
+            shutil.rmtree(self.workspace, ignore_errors=True)
+            self.workspace = None
+        return
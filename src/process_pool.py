@@ -0,0 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List
+
+
+def map_tasks(func: Callable, tasks: List, workers: int) -> List:
+    """Runs func over every task, fanned out to a process pool if workers > 1"""
+    if workers <= 1 or len(tasks) <= 1:
+        return list(map(func, tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, tasks, chunksize=chunksize))
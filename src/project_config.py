@@ -1,9 +1,12 @@
 SPLIT_DATA_FOLDER = 'split_data'
+# a csv file, or a directory or glob of .csv, .csv.gz and .csv.xz files whose
+# rows follow each other in the order of their names
 DATA_FILE = 'data/SingaporeWeather.csv'
 TEMP_FOLDER = 'temp'
-ARCHIVE_FOLDER = 'archive'
 RESULTS_FOLDER = 'results'
 MAX_FILE_LINE = 50000
+# codes of the known stations, other stations are given the next free code
+# in order of appearance when the data file is split
 MAPPER = {
     'Station': {
         'Changi': '0',
@@ -16,3 +19,48 @@ ZONE_MAP_COLS = (
     'Temperature',
     'Humidity'
 )
+# columns whose zone maps also record the value range and missing count
+VALUE_ZONE_MAP_COLS = (
+    'Temperature',
+    'Humidity'
+)
+MISSING_VALUE = 'M'
+CATALOG_FILE = f'{SPLIT_DATA_FOLDER}/catalog.json'
+CATALOG_VERSION = 9
+FINGERPRINT_BYTES = 1024 * 1024
+QUERY_WORKERS = 1
+# bytes of row ids a query keeps in memory before spilling them to TEMP_FOLDER
+QUERY_MEMORY_BUDGET = 256 * 1024 * 1024
+# bytes of decoded column zones kept in memory across stages and queries
+COLUMN_CACHE_BYTES = 512 * 1024 * 1024
+# processes a full split of the data file is fanned out to
+INGEST_WORKERS = 1
+# row order of a full split, 'arrival' keeps the order of the data file and
+# 'station' sorts rows by (station, timestamp)
+INGEST_LAYOUT = 'arrival'
+# staged rows of a station the station layout sorts in memory at a time, if
+# they did not arrive in timestamp order
+STAGE_SORT_ROWS = 1024 * 1024
+# bytes of csv each parallel ingest task counts the rows of
+INGEST_RANGE_BYTES = 64 * 1024 * 1024
+# rows each step of a range scan holds at most
+SCAN_BATCH_ROWS = 64 * 1024
+# address the query server listens on, and the number of queries it answers
+# at the same time
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8123
+SERVER_WORKERS = 4
+# folder generated data files are benchmarked in, and their sizes in rows
+BENCHMARK_FOLDER = 'benchmark'
+BENCHMARK_ROWS = (10 ** 6, 10 ** 7, 10 ** 8)
+# outermost traced stages, such as queries, kept in memory for the trace file
+TRACE_KEEP_SPANS = 1000
+# how a full split cuts zones, 'rows' every MAX_FILE_LINE rows, 'year' and
+# 'month' at partitions of that period that are merged or split to hold about
+# ZONE_TARGET_BYTES of typed columns per zone
+INGEST_PARTITION = 'rows'
+ZONE_TARGET_BYTES = 4 * 1024 * 1024
+# bytes of a data file read and decompressed at a time, on a thread that runs
+# ahead of the parsing by at most SOURCE_QUEUE_CHUNKS chunks
+SOURCE_CHUNK_BYTES = 1024 * 1024
+SOURCE_QUEUE_CHUNKS = 8
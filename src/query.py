@@ -0,0 +1,114 @@
+import argparse
+import contextlib
+import csv
+import sys
+from project_config import QUERY_WORKERS, VALUE_ZONE_MAP_COLS
+from typing import Dict, List, Union
+from QueryProcessor import QueryProcessor, GROUP_BY_UNITS
+from catalog import open_catalog
+from tracing import TRACER, format_report
+
+
+def write_rows(
+    rows: List[Dict[str, Union[str, int, float]]],
+    aggregates: List[str],
+    output: str = None
+) -> None:
+    """Writes query results as csv to output, or to stdout if not given"""
+    with contextlib.ExitStack() as stack:
+        csv_file = sys.stdout
+        if output:
+            csv_file = stack.enter_context(open(output, 'w', newline=''))
+        csv_writer = csv.DictWriter(
+            csv_file,
+            fieldnames=['Group', 'Station', 'Column', *aggregates]
+        )
+        csv_writer.writeheader()
+        csv_writer.writerows(rows)
+    return
+
+
+def main() -> None:
+    """Aggregates readings over a time range without loading the raw csv"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        '--start',
+        required=True,
+        help="first timestamp included, 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM'"
+    )
+    parser.add_argument(
+        '--end',
+        required=True,
+        help="first timestamp excluded, 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM'"
+    )
+    parser.add_argument(
+        '--stations',
+        nargs='+',
+        help='stations to include, all of them by default'
+    )
+    parser.add_argument(
+        '--aggregates',
+        nargs='+',
+        default=['min', 'max', 'mean', 'count'],
+        help='any of min, max, mean, count, sum and percentiles such as p50 or p95'
+    )
+    parser.add_argument(
+        '--group-by',
+        choices=list(GROUP_BY_UNITS),
+        default='month'
+    )
+    parser.add_argument(
+        '--columns',
+        nargs='+',
+        choices=VALUE_ZONE_MAP_COLS,
+        default=list(VALUE_ZONE_MAP_COLS)
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=QUERY_WORKERS,
+        help='number of processes the query is fanned out to'
+    )
+    parser.add_argument('--output', help='csv file to write, stdout by default')
+    parser.add_argument(
+        '--data-file',
+        help='data source the columns must have been split from, by src/main.py, '
+             'whichever it was by default'
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='TRACE_FILE',
+        help='time every stage, print a report to stderr and write a Chrome trace'
+    )
+    args = parser.parse_args()
+    TRACER.enabled = bool(args.trace)
+
+    try:
+        catalog = open_catalog(data_file=args.data_file)
+    except ValueError as e:
+        parser.error(str(e))
+    station_codes = catalog['dictionaries']['Station']
+    try:
+        processor = QueryProcessor(
+            zone_maps=catalog['zone_maps'],
+            start=args.start,
+            end=args.end,
+            stations=args.stations or list(station_codes),
+            aggregates=args.aggregates,
+            group_by=args.group_by,
+            columns=args.columns,
+            workers=args.workers,
+            station_codes=station_codes
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    with TRACER.span('query', start=args.start, end=args.end) as span:
+        rows = processor.run()
+        write_rows(rows=rows, aggregates=args.aggregates, output=args.output)
+    if args.trace:
+        print('\n'.join(format_report(report=span.report())), file=sys.stderr)
+        TRACER.write_trace(trace_file=args.trace)
+
+
+if __name__ == '__main__':
+    main()
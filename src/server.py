@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import contextlib
+import csv
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from project_config import (
+    QUERY_MEMORY_BUDGET,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    VALUE_ZONE_MAP_COLS
+)
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+from column_cache import COLUMN_CACHE
+from column_store import read_column
+from Processor import Processor, RESULT_COLUMNS
+from QueryProcessor import QueryProcessor
+from catalog import open_catalog
+from main import parse_matric_num
+
+# result rows written to the socket before waiting for the client to catch up
+STREAM_BATCH_ROWS = 1000
+
+
+class QueryServer:
+    """
+    Serves queries over local HTTP from one resident column store. Requests
+    are accepted concurrently and answered on a bounded pool of threads that
+    share the zone maps and the column cache.
+    """
+    def __init__(
+        self,
+        catalog: Dict,
+        workers: int = SERVER_WORKERS,
+        memory_budget: int = QUERY_MEMORY_BUDGET
+    ) -> None:
+        self.catalog = catalog
+        self.stations = catalog['dictionaries']['Station']
+        self.memory_budget = memory_budget
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def preload(self) -> None:
+        """Reads column zones into the column cache until it is full"""
+        zone_maps = self.catalog['zone_maps']
+        for zone in range(len(zone_maps['Timestamp'])):
+            for col in ('Timestamp', 'Station', *VALUE_ZONE_MAP_COLS):
+                read_column(col=col, zone=zone)
+            if COLUMN_CACHE.stats()['bytes'] >= COLUMN_CACHE.max_bytes:
+                return
+        return
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            # the headers are not needed
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            if len(request_line) != 3 or request_line[0] != 'GET':
+                await self.respond(
+                    writer=writer,
+                    status='405 Method Not Allowed',
+                    body='only GET is supported\n'
+                )
+                return
+            url = urlsplit(request_line[1])
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            routes = {'/scan': self.scan_rows, '/query': self.query_rows}
+            if url.path not in routes:
+                await self.respond(
+                    writer=writer,
+                    status='404 Not Found',
+                    body=f'unknown path {url.path}\n'
+                )
+                return
+            loop = asyncio.get_running_loop()
+            try:
+                header, rows = await loop.run_in_executor(
+                    self.executor,
+                    routes[url.path],
+                    params
+                )
+            except (KeyError, ValueError) as e:
+                await self.respond(
+                    writer=writer,
+                    status='400 Bad Request',
+                    body=f'{e}\n'
+                )
+                return
+            except Exception as e:
+                # e.g. a zone rewritten under the server, which must not drop the
+                # connection without a status line
+                await self.respond(
+                    writer=writer,
+                    status='500 Internal Server Error',
+                    body=f'{e}\n'
+                )
+                return
+            await self.stream_rows(writer=writer, header=header, rows=rows)
+        finally:
+            with contextlib.suppress(ConnectionError):
+                writer.close()
+                await writer.wait_closed()
+
+    async def respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: str,
+        body: str = '',
+        content_type: str = 'text/plain'
+    ) -> None:
+        writer.write(
+            f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n'
+            f'Connection: close\r\n\r\n{body}'.encode()
+        )
+        await writer.drain()
+
+    async def stream_rows(
+        self,
+        writer: asyncio.StreamWriter,
+        header: List[str],
+        rows: List[List]
+    ) -> None:
+        """Sends result rows as csv, a batch at a time"""
+        await self.respond(writer=writer, status='200 OK', content_type='text/csv')
+        batches = [[header]] + [
+            rows[start:start + STREAM_BATCH_ROWS]
+            for start in range(0, len(rows), STREAM_BATCH_ROWS)
+        ]
+        for batch in batches:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            writer.write(buffer.getvalue().encode())
+            await writer.drain()
+
+    def scan_rows(self, params: Dict[str, str]) -> Tuple[List[str], List[List]]:
+        """
+        Answers a matric query, given as matric=... or as years=<digit>&station=...,
+        from the monthly summary if there is one
+        """
+        if 'matric' in params:
+            required_years, location = parse_matric_num(matric_num=params['matric'])
+        else:
+            if params.get('station') not in self.stations:
+                raise ValueError(f'Unknown station {params.get("station")}')
+            if len(params.get('years', '')) != 1:
+                raise ValueError('years must be a single digit')
+            required_years = int(params['years'])
+            location = self.stations[params['station']]
+        processor = Processor(
+            required_years=required_years,
+            location=location,
+            zone_maps=self.catalog['zone_maps'],
+            memory_budget=self.memory_budget,
+            stations=self.stations
+        )
+        processor.process_month_and_year()
+        if self.catalog['summary'] is not None:
+            processor.summarize_months(summary=self.catalog['summary'])
+        else:
+            processor.process_location()
+            processor.aggregate_months()
+        rows = processor.query_rows(required_years=required_years, location=location)
+        return RESULT_COLUMNS, rows
+
+    def query_rows(self, params: Dict[str, str]) -> Tuple[List[str], List[List]]:
+        """Answers a time range aggregate query with the parameters of query.py"""
+        aggregates = params.get('aggregates', 'min,max,mean,count').split(',')
+        stations = params.get('stations', ','.join(self.stations))
+        columns = params.get('columns', ','.join(VALUE_ZONE_MAP_COLS))
+        processor = QueryProcessor(
+            zone_maps=self.catalog['zone_maps'],
+            start=params['start'],
+            end=params['end'],
+            stations=stations.split(','),
+            aggregates=aggregates,
+            group_by=params.get('group_by', 'month'),
+            columns=columns.split(','),
+            station_codes=self.stations
+        )
+        header = ['Group', 'Station', 'Column', *aggregates]
+        return header, [[row[name] for name in header] for row in processor.run()]
+
+
+async def serve(server: QueryServer, host: str, port: int, socket: str) -> None:
+    if socket:
+        listener = await asyncio.start_unix_server(server.handle, path=socket)
+    else:
+        listener = await asyncio.start_server(server.handle, host=host, port=port)
+    address = socket or f'http://{host}:{port}'
+    print(f'Serving queries on {address}', file=sys.stderr)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main() -> None:
+    """Keeps the column store resident and answers queries over local HTTP"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--socket', help='unix socket path to listen on instead')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=SERVER_WORKERS,
+        help='number of queries answered at the same time'
+    )
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        default=QUERY_MEMORY_BUDGET,
+        help='bytes of intermediate row ids a query keeps in memory before spilling'
+    )
+    parser.add_argument(
+        '--data-file',
+        help='data source the columns must have been split from, by src/main.py, '
+             'whichever it was by default'
+    )
+    args = parser.parse_args()
+
+    try:
+        catalog = open_catalog(data_file=args.data_file)
+    except ValueError as e:
+        parser.error(str(e))
+    server = QueryServer(
+        catalog=catalog,
+        workers=args.workers,
+        memory_budget=args.memory_budget
+    )
+    server.preload()
+    try:
+        asyncio.run(serve(
+            server=server,
+            host=args.host,
+            port=args.port,
+            socket=args.socket
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
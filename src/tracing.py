@@ -0,0 +1,174 @@
+from project_config import TRACE_KEEP_SPANS
+from collections import deque
+from typing import Callable, Dict, List
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# shared by every disabled span, entering it does nothing
+NO_SPAN = contextlib.nullcontext()
+# counters of the work done, which a span adds up from the stages within it.
+# Rows and zones in and out only describe the stage they are counted in.
+ROLLUP_COUNTERS = ('zones_opened', 'bytes_read', 'files_written')
+
+
+class Span:
+    """
+    One timed stage. Counters added while it is the innermost open span of
+    its thread are kept on it, and the ROLLUP_COUNTERS are added to its parent
+    once it ends.
+    """
+    def __init__(self, tracer: 'Tracer', name: str, args: Dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.counters: Dict[str, int] = {}
+        self.children: List[Span] = []
+        self.thread = threading.get_ident()
+        self.start = self.wall = self.cpu = 0.0
+
+    def __enter__(self) -> 'Span':
+        self.tracer.stack().append(self)
+        self.start = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.wall = time.perf_counter() - self.start
+        self.cpu = time.thread_time() - self.cpu
+        stack = self.tracer.stack()
+        stack.pop()
+        if stack:
+            parent = stack[-1]
+            parent.children.append(self)
+            parent.add(counters={
+                name: value for name, value in self.counters.items()
+                if name in ROLLUP_COUNTERS
+            })
+        else:
+            self.tracer.finish(span=self)
+        return
+
+    def add(self, counters: Dict[str, int]) -> None:
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        return
+
+    def report(self) -> Dict:
+        """Lists the times and counters of the span and of the stages within it"""
+        return {
+            'stage': self.name,
+            **self.args,
+            'wall_seconds': round(self.wall, 6),
+            'cpu_seconds': round(self.cpu, 6),
+            **self.counters,
+            'stages': [child.report() for child in self.children]
+        }
+
+    def trace_events(self, origin: float) -> List[Dict]:
+        """Converts the span and its stages into Chrome trace complete events"""
+        event = {
+            'name': self.name,
+            'ph': 'X',
+            'ts': round((self.start - origin) * 1e6, 3),
+            'dur': round(self.wall * 1e6, 3),
+            'pid': os.getpid(),
+            'tid': self.thread,
+            'args': {**self.args, 'cpu_seconds': round(self.cpu, 6), **self.counters}
+        }
+        return [event] + [
+            child_event
+            for child in self.children
+            for child_event in child.trace_events(origin=origin)
+        ]
+
+
+class Tracer:
+    """
+    Records the time and the counters of each stage of queries and ingest, when
+    enabled. Disabled, spans and counters return at once. Stages run in the
+    worker processes of a pool are not recorded.
+    """
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        # outermost spans that ended, the oldest are dropped first
+        self.spans: 'deque[Span]' = deque(maxlen=TRACE_KEEP_SPANS)
+        self.origin = time.perf_counter()
+
+    def stack(self) -> List[Span]:
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def span(self, name: str, **args) -> contextlib.AbstractContextManager:
+        if not self.enabled:
+            return NO_SPAN
+        return Span(tracer=self, name=name, args=args)
+
+    def traced(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorates a function to run within a span of its own"""
+        def decorate(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, **counters: int) -> None:
+        """Adds to the counters of the innermost open span of this thread"""
+        if not self.enabled:
+            return
+        stack = self.stack()
+        if stack:
+            stack[-1].add(counters=counters)
+        return
+
+    def finish(self, span: Span) -> None:
+        with self.lock:
+            self.spans.append(span)
+        return
+
+    def write_trace(self, trace_file: str) -> None:
+        """
+        Writes every recorded span as a Chrome trace, loadable in chrome://tracing
+        or Perfetto, along with the report of each of them
+        """
+        with self.lock:
+            spans = list(self.spans)
+        trace = {
+            'traceEvents': [
+                event for span in spans for event in span.trace_events(self.origin)
+            ],
+            'displayTimeUnit': 'ms',
+            'reports': [span.report() for span in spans]
+        }
+        with open(trace_file, 'w') as f:
+            json.dump(trace, f, indent=1)
+        return
+
+
+def format_report(report: Dict, depth: int = 0) -> List[str]:
+    """Lays a span report out as one indented line per stage"""
+    counters = ', '.join(
+        f'{name} {value}' for name, value in report.items()
+        if isinstance(value, int) and not isinstance(value, bool)
+    )
+    lines = [
+        f'{"  " * depth}{report["stage"]}: {report["wall_seconds"]:.4f}s wall, '
+        f'{report["cpu_seconds"]:.4f}s cpu' + (f', {counters}' if counters else '')
+    ]
+    for stage in report['stages']:
+        lines.extend(format_report(report=stage, depth=depth + 1))
+    return lines
+
+
+# shared by every stage of the process, enabled by --trace
+TRACER = Tracer()
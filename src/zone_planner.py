@@ -0,0 +1,74 @@
+from typing import List, Optional
+
+# characters of a 'YYYY-MM-DD HH:MM' timestamp that make up the partition key of
+# each way of partitioning zones, row partitioned zones have no key
+PARTITION_KEYS = {
+    'rows': None,
+    'year': 4,
+    'month': 7
+}
+
+
+def partition_key(timestamp: str, partition: str) -> Optional[str]:
+    key_length = PARTITION_KEYS[partition]
+    return None if key_length is None else timestamp[:key_length]
+
+
+class ZonePlanner:
+    """
+    Decides where zones end from the partition key of each row, in order.
+    Row partitioned zones are cut every limit rows. Time partitioned zones
+    hold whole partitions: consecutive partitions share a zone while they fit
+    in limit rows, and a partition of more than limit rows is split over
+    zones of its own. The same keys always give the same zones, however the
+    rows are fed in.
+    """
+    def __init__(
+        self,
+        limit: int,
+        whole: bool,
+        held: int = 0,
+        key: str = None
+    ) -> None:
+        self.limit = limit
+        self.whole = whole
+        # rows given to the open zone, held rows were written to it before
+        self.zone = held
+        # rows of the current partition not given to a zone yet
+        self.part = 0
+        self.key = key
+
+    def add(self, key: Optional[str], count: int = 1) -> List[int]:
+        """Adds count rows of a partition, returns the sizes of the zones they close"""
+        closed = []
+        if not self.whole:
+            while count:
+                taken = min(count, self.limit - self.zone)
+                self.zone += taken
+                count -= taken
+                if self.zone == self.limit:
+                    closed.append(self.zone)
+                    self.zone = 0
+            return closed
+        if key != self.key:
+            # the ended partition always fits, or its zone would have been closed
+            self.zone += self.part
+            self.part = 0
+            self.key = key
+        while count:
+            taken = min(count, self.limit - self.part)
+            self.part += taken
+            count -= taken
+            if self.zone and self.zone + self.part > self.limit:
+                closed.append(self.zone)
+                self.zone = 0
+            if self.part == self.limit:
+                closed.append(self.part)
+                self.part = 0
+        return closed
+
+    def finish(self) -> List[int]:
+        """Closes the open zone, returns its size if it holds any rows"""
+        rows = self.zone + self.part
+        self.zone = self.part = 0
+        return [rows] if rows else []
@@ -0,0 +1,58 @@
+from typing import Dict, Tuple
+from unittest import TestCase, mock
+import copy
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from column_cache import COLUMN_CACHE  # noqa: E402
+from ingest import split_columns  # noqa: E402
+from project_config import MAPPER, SPLIT_DATA_FOLDER, ZONE_MAP_COLS  # noqa: E402
+
+
+def work_in_temp_folder(test: TestCase) -> None:
+    """Runs a test from a temporary folder of its own, removed after it"""
+    folder = tempfile.TemporaryDirectory()
+    test.addCleanup(folder.cleanup)
+    cwd = os.getcwd()
+    os.chdir(folder.name)
+    test.addCleanup(os.chdir, cwd)
+    return
+
+
+def use_temp_split_folder(test: TestCase) -> None:
+    """Points the column store at an empty temporary folder and column cache"""
+    folder = tempfile.TemporaryDirectory()
+    test.addCleanup(folder.cleanup)
+    patcher = mock.patch('column_store.SPLIT_DATA_FOLDER', folder.name)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    COLUMN_CACHE.clear()
+    test.addCleanup(COLUMN_CACHE.clear)
+    return
+
+
+def split_files(
+    data_file: str,
+    zone_rows: int,
+    **kwargs
+) -> Tuple[Dict, Dict[str, bytes], Dict[str, Dict[str, str]]]:
+    """
+    Splits a data file into zones of zone_rows rows, and gets the zone maps,
+    the bytes of every file of the split data folder and the dictionaries
+    """
+    dictionaries = copy.deepcopy(MAPPER)
+    with mock.patch('ingest.MAX_FILE_LINE', zone_rows):
+        zone_maps = split_columns(
+            data_file=data_file,
+            zone_maps={col: [] for col in ZONE_MAP_COLS},
+            dictionaries=dictionaries,
+            **kwargs
+        )
+    files = {}
+    for name in sorted(os.listdir(SPLIT_DATA_FOLDER)):
+        with open(os.path.join(SPLIT_DATA_FOLDER, name), 'rb') as f:
+            files[name] = f.read()
+    return zone_maps, files, dictionaries
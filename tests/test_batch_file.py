@@ -0,0 +1,91 @@
+from unittest import TestCase
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import copy  # noqa: E402
+import pandas as pd  # noqa: E402
+from pandas.testing import assert_frame_equal  # noqa: E402
+from convert_dataframe import read_data, scan_result  # noqa: E402
+from fixtures import work_in_temp_folder  # noqa: E402
+from column_cache import COLUMN_CACHE  # noqa: E402
+from generate_data import generate_data  # noqa: E402
+from ingest import split_columns  # noqa: E402
+from main import process_batch, read_batch_file  # noqa: E402
+from monthly_summary import build_summary  # noqa: E402
+from project_config import MAPPER, RESULTS_FOLDER, ZONE_MAP_COLS  # noqa: E402
+
+
+class TestBatchFile(TestCase):
+    def setUp(self):
+        work_in_temp_folder(test=self)
+
+    def read(self, *lines):
+        with open('queries.txt', 'w') as f:
+            f.write('\n'.join(lines))
+        return read_batch_file(batch_file='queries.txt')
+
+    def test_reads_matric_numbers_and_query_specs(self):
+        self.assertEqual(
+            self.read('u2022913c', '', 'mine,3,Paya Lebar', ' other-1.b,0,Changi '),
+            [('u2022913c', 3, '1'), ('mine', 3, '1'), ('other-1.b', 0, '0')]
+        )
+
+    def test_rejects_invalid_lines(self):
+        for line in (
+            'u20229c',
+            'u20/2913c',
+            'mine,3',
+            'mine,3,Paya Lebar,4',
+            'mine,x,Changi',
+            'mine,13,Changi',
+            'mine,3,Nowhere',
+            ',3,Changi',
+            '../mine,3,Changi',
+            'sub/mine,3,Changi',
+            '.mine,3,Changi'
+        ):
+            with self.subTest(line=line):
+                with self.assertRaisesRegex(ValueError, 'queries.txt line 2'):
+                    self.read('u2022913c', line)
+
+    def test_process_batch_writes_a_result_per_query(self):
+        generate_data(data_file='data.csv', rows=20000)
+        dictionaries = copy.deepcopy(MAPPER)
+        COLUMN_CACHE.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            zone_maps = split_columns(
+                data_file='data.csv',
+                zone_maps={col: [] for col in ZONE_MAP_COLS},
+                dictionaries=dictionaries
+            )
+        df = read_data('data.csv')
+        queries = self.read('u2022913c', 'mine,3,Changi')
+        for summary in (None, build_summary(zone_maps=zone_maps)):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                process_batch(
+                    queries=queries,
+                    zone_maps=zone_maps,
+                    stations=dictionaries['Station'],
+                    summary=summary
+                )
+            # only a scan of the columns reports the column cache
+            self.assertEqual('Column cache' in out.getvalue(), summary is None)
+            for name, required_years, station in (
+                ('u2022913c', 3, 'Paya Lebar'),
+                ('mine', 3, 'Changi')
+            ):
+                with self.subTest(name=name, summary=summary is not None):
+                    actual = pd.read_csv(
+                        os.path.join(RESULTS_FOLDER, f'ScanResult_{name}.csv')
+                    ).sort_values(['Date', 'Category'], ignore_index=True)
+                    expected = scan_result(
+                        df=df,
+                        required_years=required_years,
+                        station=station
+                    )
+                    assert_frame_equal(actual, expected, check_dtype=False)
@@ -0,0 +1,44 @@
+from unittest import TestCase
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np  # noqa: E402
+from column_cache import ColumnCache  # noqa: E402
+
+
+def load(col, zone):
+    return np.zeros(10, dtype=np.int64)  # 80 bytes
+
+
+class TestColumnCache(TestCase):
+    def test_hits_and_misses(self):
+        cache = ColumnCache(max_bytes=1000)
+        cache.get('Station', 0, load)
+        cache.get('Station', 0, load)
+        cache.get('Station', 1, load)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['bytes'], 160)
+
+    def test_evicts_least_recently_used(self):
+        cache = ColumnCache(max_bytes=160)
+        cache.get('Station', 0, load)
+        cache.get('Station', 1, load)
+        cache.get('Station', 0, load)
+        cache.get('Station', 2, load)
+        self.assertEqual(list(cache.chunks), [('Station', 0), ('Station', 2)])
+        self.assertEqual(cache.nbytes, 160)
+
+    def test_oversized_chunk_is_not_kept(self):
+        cache = ColumnCache(max_bytes=40)
+        self.assertEqual(len(cache.get('Station', 0, load)), 10)
+        self.assertEqual(cache.stats()['chunks'], 0)
+
+    def test_discard(self):
+        cache = ColumnCache(max_bytes=1000)
+        cache.get('Station', 0, load)
+        cache.discard('Station', 0)
+        cache.get('Station', 0, load)
+        self.assertEqual(cache.stats()['misses'], 2)
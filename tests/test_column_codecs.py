@@ -0,0 +1,44 @@
+from unittest import TestCase
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from column_codecs import CODECS  # noqa: E402
+
+
+def round_trip(name, values):
+    header, payload = CODECS[name].encode(values=values)
+    codec = CODECS[header['codec']]
+    return header, codec.decode(header=header, payload=payload.tobytes())
+
+
+class TestColumnCodecs(TestCase):
+    def test_delta_timestamps(self):
+        values = np.array([600, 660, 720, 600, 10 ** 9], dtype=np.int64)
+        header, decoded = round_trip('delta', values)
+        self.assertEqual(decoded.tolist(), values.tolist())
+        self.assertEqual(decoded.dtype, np.int64)
+        _, payload = CODECS['delta'].encode(values=values[:3])
+        self.assertEqual(payload.dtype, np.int8)
+
+    def test_dictionary_bit_packs_stations(self):
+        for distinct in (1, 2, 3, 5, 17):
+            values = (np.arange(11) % distinct).astype(np.uint8)
+            header, decoded = round_trip('dictionary', values)
+            self.assertEqual(decoded.tolist(), values.tolist())
+        header, payload = CODECS['dictionary'].encode(values=values[:9] % 2)
+        self.assertEqual((header['bits'], payload.nbytes), (1, 2))
+
+    def test_scaled_readings_keep_missing(self):
+        values = np.array([25.1, np.nan, -3.3, 100.0], dtype=np.float32)
+        header, decoded = round_trip('scaled', values)
+        self.assertEqual((header['codec'], header['scale']), ('scaled', 10))
+        self.assertTrue(np.array_equal(decoded, values, equal_nan=True))
+
+    def test_scaled_falls_back_to_plain(self):
+        values = np.array([1e-5, 2], dtype=np.float32)
+        header, decoded = round_trip('scaled', values)
+        self.assertEqual(header['codec'], 'plain')
+        self.assertEqual(decoded.tolist(), values.tolist())
@@ -0,0 +1,87 @@
+from unittest import TestCase
+import math
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fixtures import use_temp_split_folder  # noqa: E402
+from column_store import (  # noqa: E402
+    encode_values,
+    open_column,
+    write_column,
+    split_range,
+    scan_range,
+    scan_positions,
+    to_minutes,
+    minutes_to_dates
+)
+
+
+class TestColumnStore(TestCase):
+    def test_timestamps_round_trip(self):
+        values = ['2003-01-31 23:30', '2003-02-01 00:00']
+        minutes = encode_values('Timestamp', values)
+        self.assertEqual(minutes[0], to_minutes(values[0]))
+        self.assertEqual(minutes[1] - minutes[0], 30)
+        self.assertEqual(list(minutes_to_dates(minutes)), ['2003-01-31', '2003-02-01'])
+
+    def test_missing_readings_become_nan(self):
+        temperatures = encode_values('Temperature', ['25.1', 'M', '30'])
+        self.assertEqual(str(temperatures[0]), '25.1')
+        self.assertTrue(math.isnan(temperatures[1]))
+        self.assertEqual(str(temperatures[2]), '30.0')
+
+    def test_station_codes(self):
+        self.assertEqual(list(encode_values('Station', ['0', '1'])), [0, 1])
+
+
+class TestColumnZones(TestCase):
+    def setUp(self):
+        use_temp_split_folder(test=self)
+        # three zones of 4, 4 and 2 rows holding their own row ids
+        self.zones = {}
+        for zone, (min_idx, max_idx) in enumerate([(0, 3), (4, 7), (8, 9)]):
+            write_column('id', zone, np.arange(min_idx, max_idx + 1))
+            self.zones[zone] = {'min_idx': min_idx, 'max_idx': max_idx}
+
+    def test_split_range_crosses_zones(self):
+        self.assertEqual(
+            split_range(self.zones, 2, 9),
+            [(0, 2, 4), (1, 4, 8), (2, 8, 9)]
+        )
+        self.assertEqual(split_range(self.zones, 5, 6), [(1, 5, 6)])
+        self.assertEqual(split_range(self.zones, 6, 6), [])
+        # a task may only hand over the zones it needs
+        self.assertEqual(split_range({1: self.zones[1]}, 5, 8), [(1, 5, 8)])
+
+    def test_scan_range_batches(self):
+        batches = list(scan_range('id', self.zones, 1, 10, batch_rows=3))
+        self.assertEqual(
+            [row_ids.tolist() for row_ids, _ in batches],
+            [[1, 2, 3], [4, 5, 6], [7], [8, 9]]
+        )
+        for row_ids, values in batches:
+            self.assertEqual(row_ids.tolist(), values.tolist())
+
+    def test_scan_positions(self):
+        positions = np.array([0, 3, 6, 7, 9])
+        batches = list(scan_positions('id', self.zones, positions, batch_rows=1))
+        self.assertEqual(
+            [values.tolist() for _, values in batches],
+            [[0], [3], [6], [7], [9]]
+        )
+        self.assertEqual(list(scan_positions('id', self.zones, np.array([]))), [])
+
+    def test_plain_zones_are_memory_mapped(self):
+        # readings that do not round trip as scaled integers are stored plain
+        values = np.array([1 / 3, np.nan], dtype=np.float32)
+        write_column('Temperature', 3, values)
+        mapped = open_column('Temperature', 3)
+        self.assertIsInstance(mapped, np.memmap)
+        self.assertTrue(np.array_equal(mapped, values, equal_nan=True))
+        # a rewritten zone replaces the file, the old map still reads its rows
+        write_column('Temperature', 3, np.array([2], dtype=np.float32))
+        self.assertTrue(np.array_equal(mapped, values, equal_nan=True))
+        self.assertEqual(len(open_column('Temperature', 3)), 3)
@@ -0,0 +1,63 @@
+from unittest import TestCase
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from catalog import count_rows  # noqa: E402
+from data_source import list_sources, read_header, read_lines  # noqa: E402
+from fixtures import split_files, work_in_temp_folder  # noqa: E402
+
+HEADER = 'id,Timestamp,Station,Temperature,Humidity'
+
+
+class TestDataSource(TestCase):
+    def setUp(self):
+        work_in_temp_folder(test=self)
+        self.rows = [
+            f'{i},{2002 + i // 8}-0{1 + i % 8}-01 00:00,'
+            f'{["Changi", "Tuas", "Paya Lebar"][i % 3]},{25 + i % 5}.{i % 10},{70 + i}'
+            for i in range(24)
+        ]
+        os.makedirs('sources')
+        # one file per year, the last one without a trailing newline
+        openers = [(open, '.csv'), (gzip.open, '.csv.gz'), (lzma.open, '.csv.xz')]
+        for year, (opener, suffix) in enumerate(openers):
+            rows = self.rows[year * 8:(year + 1) * 8]
+            with opener(f'sources/{2002 + year}{suffix}', 'wt') as f:
+                f.write('\n'.join([HEADER, *rows]) + ('' if year == 2 else '\n'))
+        with open('sources/notes.txt', 'w') as f:
+            f.write('not a data file\n')
+        with open('data.csv', 'w') as f:
+            f.write('\n'.join([HEADER, *self.rows]) + '\n')
+
+    def test_lines_of_every_file_follow_each_other(self):
+        paths = list_sources(data_source='sources')
+        self.assertEqual(
+            [os.path.basename(path) for path in paths],
+            ['2002.csv', '2003.csv.gz', '2004.csv.xz']
+        )
+        self.assertEqual(list_sources(data_source='sources/*.csv*'), paths)
+        self.assertEqual(read_header(data_source='sources'), HEADER.split(','))
+        # chunks smaller than a line are joined up again
+        for chunk_bytes in (7, 1024):
+            lines = list(read_lines(paths=paths, chunk_bytes=chunk_bytes))
+            self.assertEqual(lines, self.rows)
+
+    def test_files_must_share_a_header(self):
+        with open('sources/2005.csv', 'w') as f:
+            f.write('id,Timestamp,Station\n')
+        with self.assertRaises(ValueError):
+            list(read_lines(paths=list_sources(data_source='sources')))
+
+    def test_split_of_sources_matches_split_of_one_csv(self):
+        splits = []
+        for data_file in ('data.csv', 'sources'):
+            with contextlib.redirect_stdout(io.StringIO()):
+                splits.append(split_files(data_file=data_file, zone_rows=5))
+        self.assertEqual(splits[0], splits[1])
+        self.assertEqual(count_rows(zone_maps=splits[1][0]), len(self.rows))
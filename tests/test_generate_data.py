@@ -0,0 +1,51 @@
+from unittest import TestCase
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from benchmark import measure  # noqa: E402
+from generate_data import generate_data  # noqa: E402
+
+
+class TestGenerateData(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def generate(self, name, **kwargs):
+        path = f'{self.folder}/{name}.csv'
+        generate_data(data_file=path, **kwargs)
+        with open(path, 'r') as f:
+            return f.read().splitlines()
+
+    def test_same_seed_gives_same_file(self):
+        lines = self.generate('a', rows=5000, seed=3)
+        self.assertEqual(lines, self.generate('b', rows=5000, seed=3, chunk_rows=777))
+        self.assertNotEqual(lines, self.generate('c', rows=5000, seed=4))
+
+    def test_schema(self):
+        lines = self.generate('a', rows=5001, stations=['Changi', 'Paya Lebar', 'Tuas'])
+        self.assertEqual(lines[0], 'id,Timestamp,Station,Temperature,Humidity')
+        rows = [line.split(',') for line in lines[1:]]
+        self.assertEqual(len(rows), 5001)
+        self.assertEqual(rows[0][:3], ['0', '2002-01-01 00:00', 'Changi'])
+        self.assertEqual(rows[1][1], rows[2][1])
+        self.assertEqual(rows[3][2], 'Changi')
+        self.assertLess(rows[-1][1], '2022-01-01 00:00')
+        temperatures = [row[3] for row in rows]
+        self.assertIn('M', temperatures)
+        self.assertTrue(all(
+            22 <= float(value) <= 35 for value in temperatures if value != 'M'
+        ))
+
+    def test_measure_records_a_stage(self):
+        stages = []
+        with measure(stage='generate', stages=stages):
+            self.generate('a', rows=100)
+        self.assertEqual(stages[0]['stage'], 'generate')
+        self.assertGreater(stages[0]['peak_rss'], 0)
+        if stages[0]['bytes_written'] is not None:
+            self.assertGreaterEqual(stages[0]['bytes_written'], 100 * 20)
@@ -0,0 +1,73 @@
+from unittest import TestCase
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import main  # noqa: E402
+from fixtures import work_in_temp_folder  # noqa: E402
+
+HEADER = 'id,Timestamp,Station,Temperature,Humidity\n'
+
+
+def reading(i: int, timestamp: str) -> str:
+    return f'{i},{timestamp},Changi,{25 + i % 5}.0,{70 + i}\n'
+
+
+class TestLoadColumnStore(TestCase):
+    def setUp(self):
+        work_in_temp_folder(test=self)
+        self.data_file = 'data.csv'
+        with open(self.data_file, 'w') as f:
+            f.write(HEADER)
+            f.writelines(reading(i, f'2003-01-{1 + i:02d} 00:00') for i in range(10))
+
+    def load(self, delta_files=()):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            catalog = main.load_column_store(data_file=self.data_file)
+            catalog = main.append_delta_files(
+                catalog=catalog,
+                data_file=self.data_file,
+                delta_files=list(delta_files)
+            )
+        return catalog, out.getvalue()
+
+    def test_late_reading_splits_again(self):
+        self.load()
+        with open(self.data_file, 'a') as f:
+            f.write(reading(10, '2003-01-05 12:00'))
+        catalog, log = self.load()
+        self.assertIn('Cannot append the new rows', log)
+        self.assertEqual(catalog['row_count'], 11)
+        catalog, log = self.load()
+        self.assertIn('Reusing split columns', log)
+
+    def test_deltas_are_appended_again_after_a_split(self):
+        with open('delta.csv', 'w') as f:
+            f.write(HEADER + reading(0, '2003-02-01 00:00'))
+        self.load(delta_files=['delta.csv'])
+        with open(self.data_file, 'a') as f:
+            f.write(reading(10, '2003-01-20 00:00'))
+        catalog, _ = self.load()
+        self.assertEqual(catalog['row_count'], 12)
+        self.assertEqual(len(catalog['deltas']), 1)
+        last_zone = catalog['zone_maps']['Timestamp'][-1]
+        self.assertEqual(last_zone['max_date'], '2003-02-01 00:00')
+
+    def test_delta_rows_out_of_order_are_not_appended(self):
+        catalog, _ = self.load()
+        with open('delta.csv', 'w') as f:
+            f.write(HEADER)
+            f.writelines(
+                reading(10 + i, timestamp)
+                for i, timestamp in enumerate(
+                    ['2003-02-02 00:00', '2003-03-01 00:00', '2003-02-03 00:00']
+                )
+            )
+        catalog, log = self.load(delta_files=['delta.csv'])
+        self.assertIn('Cannot append', log)
+        self.assertEqual(catalog['row_count'], 10)
+        self.assertEqual(catalog['deltas'], [])
@@ -19,7 +19,7 @@ class TestMain(TestCase):
 
 def assertFrameEqual(df1, df2, **kwds):
     """ Assert that two dataframes are equal, ignoring ordering of columns"""
-    from pandas.util.testing import assert_frame_equal
+    from pandas.testing import assert_frame_equal
     return assert_frame_equal(
         df1.sort_index(axis=1),
         df2.sort_index(axis=1),
@@ -0,0 +1,56 @@
+from unittest import TestCase
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from column_store import encode_values, write_column  # noqa: E402
+from fixtures import use_temp_split_folder  # noqa: E402
+from monthly_summary import merge_cells, summarize_zone  # noqa: E402
+
+
+class TestMonthlySummary(TestCase):
+    def setUp(self):
+        use_temp_split_folder(test=self)
+        rows = [
+            ('2003-01-01 00:00', '0', '25.1', '80'),
+            ('2003-01-02 00:00', '1', '30', 'M'),
+            ('2003-01-03 12:00', '0', '25.1', '90'),
+            ('2003-01-04 00:00', '0', '28', 'M'),
+            ('2003-02-01 00:00', '0', 'M', 'M')
+        ]
+        for col, values in zip(
+            ('Timestamp', 'Station', 'Temperature', 'Humidity'),
+            zip(*rows)
+        ):
+            write_column(col, 0, encode_values(col, list(values)))
+
+    def test_cells_hold_ties_and_missing_readings(self):
+        cells = summarize_zone(zone=0)
+        self.assertEqual(sorted(cells), ['0/2003-01', '0/2003-02', '1/2003-01'])
+        temperature = cells['0/2003-01']['Temperature']
+        self.assertEqual(temperature['min'], 25.1)
+        self.assertEqual(temperature['min_dates'], ['2003-01-01', '2003-01-03'])
+        self.assertEqual(
+            (temperature['max'], temperature['max_dates']),
+            (28.0, ['2003-01-04'])
+        )
+        self.assertEqual(temperature['count'], 3)
+        self.assertAlmostEqual(temperature['sum'], 78.2, places=4)
+        self.assertEqual(cells['1/2003-01']['Humidity']['min'], None)
+        self.assertEqual(cells['0/2003-02']['Temperature']['count'], 0)
+        self.assertEqual(np.float32(temperature['min']), np.float32('25.1'))
+
+    def test_merge_cells(self):
+        cells = summarize_zone(zone=0)
+        merged = merge_cells(cells['0/2003-01'], cells['1/2003-01'])
+        self.assertEqual(merged['Temperature']['max'], 30.0)
+        self.assertEqual(merged['Temperature']['max_dates'], ['2003-01-02'])
+        self.assertEqual(merged['Temperature']['count'], 4)
+        self.assertEqual(merged['Humidity']['min_dates'], ['2003-01-01'])
+        merged = merge_cells(cells['0/2003-01'], cells['0/2003-01'])
+        self.assertEqual(
+            merged['Temperature']['min_dates'],
+            ['2003-01-01', '2003-01-03']
+        )
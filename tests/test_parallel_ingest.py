@@ -0,0 +1,86 @@
+from unittest import TestCase, mock
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import contextlib  # noqa: E402
+import io  # noqa: E402
+import ingest  # noqa: E402
+from column_store import read_column  # noqa: E402
+from fixtures import split_files, work_in_temp_folder  # noqa: E402
+
+
+class TestParallelIngest(TestCase):
+    def setUp(self):
+        work_in_temp_folder(test=self)
+        lines = ['id,Timestamp,Station,Temperature,Humidity']
+        stations = ['Changi', 'Tuas', 'Paya Lebar', 'Tuas']
+        for i in range(23):
+            temperature = 'M' if i % 7 == 0 else f'{25 + i % 5}.{i % 10}'
+            lines.append(f'{i},2002-01-{1 + i // 24:02d} {i % 24:02d}:00,'
+                         f'{stations[i % 4]},{temperature},{70 + i}')
+        # blank and carriage return terminated lines are tolerated
+        lines.insert(5, '')
+        self.data_file = 'data.csv'
+        with open(self.data_file, 'w', newline='') as f:
+            f.write('\r\n'.join(lines))
+
+    def split(self, workers, layout='arrival', data_file=None):
+        with mock.patch('ingest.INGEST_RANGE_BYTES', 64), \
+                mock.patch('ingest.map_tasks', lambda func, tasks, workers: [
+                    func(task) for task in tasks
+                ]):
+            return split_files(
+                data_file=data_file or self.data_file,
+                zone_rows=5,
+                workers=workers,
+                layout=layout
+            )
+
+    def test_byte_ranges_are_newline_aligned(self):
+        ranges = ingest.byte_ranges(data_file=self.data_file, range_bytes=64)
+        self.assertGreater(len(ranges), 1)
+        with open(self.data_file, 'rb') as f:
+            data = f.read()
+        self.assertEqual(ranges[0][0], data.index(b'\n') + 1)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[end - 1:end], b'\n')
+
+    def test_parallel_split_matches_sequential(self):
+        zone_maps, files, dictionaries = self.split(workers=1)
+        self.assertEqual(len(zone_maps['Timestamp']), 5)
+        self.assertEqual(dictionaries['Station']['Tuas'], '2')
+        self.assertEqual((zone_maps, files, dictionaries), self.split(workers=4))
+
+    def test_station_layout_clusters_rows(self):
+        zone_maps, _, dictionaries = self.split(workers=1, layout='station')
+        self.assertTrue(all(entry['clustered'] for entry in zone_maps['Station']))
+        stations = [
+            code
+            for zone in range(len(zone_maps['Station']))
+            for code in read_column(col='Station', zone=zone).tolist()
+        ]
+        self.assertEqual(stations, sorted(stations))
+        # every (station, month) is one contiguous range of rows
+        self.assertEqual(
+            zone_maps['Timestamp'][1]['months'],
+            {'0': {'2002-01': [5, 6]}, '1': {'2002-01': [6, 10]}}
+        )
+
+    def test_station_layout_sorts_late_rows_in_bounded_runs(self):
+        with open(self.data_file, 'r', newline='') as f:
+            header, *lines = f.read().split('\r\n')
+        # every third row arrives after the rows following it
+        late = [line for i, line in enumerate(lines) if i % 3 != 0]
+        late += [line for i, line in enumerate(lines) if i % 3 == 0]
+        with open('late.csv', 'w') as f:
+            f.write('\n'.join([header, *late]))
+        expected = self.split(workers=1, layout='station')
+        out = io.StringIO()
+        with mock.patch('ingest.STAGE_SORT_ROWS', 2), contextlib.redirect_stdout(out):
+            actual = self.split(workers=2, layout='station', data_file='late.csv')
+        self.assertEqual(actual, expected)
+        self.assertIn('Only the arrival layout is split in parallel', out.getvalue())
@@ -0,0 +1,37 @@
+from unittest import TestCase
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from position_store import PositionStore  # noqa: E402
+
+
+class TestPositionStore(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.spill_folder = folder.name
+
+    def test_spilled_stores_use_their_own_workspace(self):
+        stores = [
+            PositionStore(memory_budget=0, spill_folder=self.spill_folder)
+            for _ in range(2)
+        ]
+        for i, store in enumerate(stores):
+            store.put(key=('0', 2003, 1), positions=np.arange(i, i + 3))
+        self.assertNotEqual(stores[0].workspace, stores[1].workspace)
+        self.assertEqual(stores[1].get(key=('0', 2003, 1)).tolist(), [1, 2, 3])
+        stores[0].clear()
+        self.assertEqual(os.listdir(self.spill_folder), [os.path.basename(
+            stores[1].workspace
+        )])
+        self.assertEqual(stores[1].get(key=('0', 2003, 1)).tolist(), [1, 2, 3])
+
+    def test_in_memory_within_budget(self):
+        store = PositionStore(memory_budget=64, spill_folder=self.spill_folder)
+        store.put(key='a', positions=[1, 2])
+        self.assertIsNone(store.workspace)
+        self.assertEqual(store.keys(), ['a'])
@@ -0,0 +1,193 @@
+from unittest import TestCase, mock
+import contextlib
+import copy
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from pandas.testing import assert_frame_equal  # noqa: E402
+from column_cache import COLUMN_CACHE  # noqa: E402
+from ingest import split_columns  # noqa: E402
+from project_config import MAPPER, MISSING_VALUE, ZONE_MAP_COLS  # noqa: E402
+from QueryProcessor import QueryProcessor  # noqa: E402
+
+STATIONS = ['Changi', 'Paya Lebar', 'Tuas']
+COLUMNS = ['Temperature', 'Humidity']
+AGGREGATES = ['min', 'max', 'mean', 'count', 'sum', 'p50', 'p99.9']
+# rows a zone holds, few enough for every query range to start and end mid-zone
+ZONE_ROWS = 500
+# (station, month) groups without a single reading of the columns
+MISSING_GROUPS = [
+    ('Tuas', '2004-06', ['Temperature']),
+    ('Paya Lebar', '2004-07', COLUMNS)
+]
+# (start, end, stations, group by) of each query checked
+QUERIES = [
+    ('2003-02-10 06:00', '2005-07-20 12:00', ['Changi', 'Tuas'], 'month'),
+    ('2003-01-01 00:00', '2006-01-01 00:00', STATIONS, 'year'),
+    ('2004-05-28 12:00', '2004-07-03 00:00', STATIONS, 'day')
+]
+# characters of a timestamp kept by each group by
+GROUP_WIDTHS = {'day': 10, 'month': 7, 'year': 4}
+
+
+def write_data(data_file: str) -> None:
+    """
+    Writes a reading of each station every 12 hours over 2003 to 2005, some of
+    them missing and none at all in MISSING_GROUPS
+    """
+    rng = np.random.default_rng(0)
+    slots = np.arange('2003-01-01T00:00', '2006-01-01T00:00', 12 * 60, 'datetime64[m]')
+    timestamps = np.char.replace(np.datetime_as_string(slots, unit='m'), 'T', ' ')
+    with open(data_file, 'w') as f:
+        f.write('id,Timestamp,Station,Temperature,Humidity\n')
+        for i, timestamp in enumerate(np.repeat(timestamps, len(STATIONS))):
+            station = STATIONS[i % len(STATIONS)]
+            missing_cols = [
+                col
+                for group_station, month, cols in MISSING_GROUPS
+                if station == group_station and timestamp.startswith(month)
+                for col in cols
+            ]
+            readings = [
+                MISSING_VALUE if rng.random() < 0.05 or col in missing_cols
+                else rng.integers(low, high + 1) / 10
+                for col, (low, high) in zip(COLUMNS, [(220, 350), (400, 1000)])
+            ]
+            f.write(f'{i},{timestamp},{station},{",".join(map(str, readings))}\n')
+    return
+
+
+def expected_rows(
+    df: pd.DataFrame,
+    start: str,
+    end: str,
+    stations: list,
+    group_by: str
+) -> pd.DataFrame:
+    """Aggregates a query with a pandas groupby, leaving out groups without readings"""
+    df = df[(df['Timestamp'] >= start) & (df['Timestamp'] < end)]
+    df = df[df['Station'].isin(stations)]
+    df = df.assign(Group=df['Timestamp'].str[:GROUP_WIDTHS[group_by]])
+    frames = []
+    for col in COLUMNS:
+        values = df.dropna(subset=[col]).groupby(['Group', 'Station'])[col]
+        frame = values.agg(['min', 'max', 'mean', 'count', 'sum'])
+        frame['p50'] = values.quantile(0.5)
+        frame['p99.9'] = values.quantile(0.999)
+        frames.append(frame.reset_index().assign(Column=col))
+    return sort_rows(pd.concat(frames))
+
+
+def sort_rows(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[['Group', 'Station', 'Column', *AGGREGATES]]
+    return df.sort_values(['Group', 'Station', 'Column'], ignore_index=True)
+
+
+class TestQueryProcessor(TestCase):
+    """Checks QueryProcessor.run() against pandas on both layouts and pool sizes"""
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.cwd = os.getcwd()
+        os.chdir(cls.folder.name)
+        cls.data_file = os.path.abspath('data.csv')
+        write_data(data_file=cls.data_file)
+        cls.df = pd.read_csv(
+            cls.data_file,
+            dtype={'Timestamp': str, 'Station': str},
+            na_values={col: [MISSING_VALUE] for col in COLUMNS},
+            keep_default_na=False
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        cls.folder.cleanup()
+
+    def split(self, layout: str):
+        COLUMN_CACHE.clear()
+        dictionaries = copy.deepcopy(MAPPER)
+        with mock.patch('ingest.MAX_FILE_LINE', ZONE_ROWS):
+            with contextlib.redirect_stdout(io.StringIO()):
+                zone_maps = split_columns(
+                    data_file=self.data_file,
+                    zone_maps={col: [] for col in ZONE_MAP_COLS},
+                    dictionaries=dictionaries,
+                    workers=1,
+                    layout=layout,
+                    partition='rows'
+                )
+        return zone_maps, dictionaries['Station']
+
+    def query(self, zone_maps, station_codes, **kwargs):
+        processor = QueryProcessor(
+            zone_maps=zone_maps,
+            aggregates=AGGREGATES,
+            columns=COLUMNS,
+            station_codes=station_codes,
+            **kwargs
+        )
+        return sort_rows(pd.DataFrame(processor.run(), columns=[
+            'Group', 'Station', 'Column', *AGGREGATES
+        ]))
+
+    def test_run_matches_pandas(self):
+        for layout in ('arrival', 'station'):
+            zone_maps, station_codes = self.split(layout=layout)
+            self.assertGreater(len(zone_maps['Timestamp']), len(STATIONS))
+            for (start, end, stations, group_by), workers in (
+                (query, workers) for query in QUERIES for workers in (1, 2)
+            ):
+                with self.subTest(layout=layout, start=start, workers=workers):
+                    actual = self.query(
+                        zone_maps=zone_maps,
+                        station_codes=station_codes,
+                        start=start,
+                        end=end,
+                        stations=stations,
+                        group_by=group_by,
+                        workers=workers
+                    )
+                    expected = expected_rows(
+                        df=self.df,
+                        start=start,
+                        end=end,
+                        stations=stations,
+                        group_by=group_by
+                    )
+                    assert_frame_equal(actual, expected, check_dtype=False)
+
+    def test_groups_without_readings_are_left_out(self):
+        zone_maps, station_codes = self.split(layout='arrival')
+        actual = self.query(
+            zone_maps=zone_maps,
+            station_codes=station_codes,
+            start='2004-06-01 00:00',
+            end='2004-08-01 00:00',
+            stations=['Paya Lebar', 'Tuas'],
+            group_by='month'
+        )
+        reported = set(zip(actual['Station'], actual['Group'], actual['Column']))
+        self.assertNotIn(('Tuas', '2004-06', 'Temperature'), reported)
+        self.assertIn(('Tuas', '2004-06', 'Humidity'), reported)
+        self.assertFalse({('Paya Lebar', '2004-07', col) for col in COLUMNS} & reported)
+        self.assertIn(('Paya Lebar', '2004-06', 'Temperature'), reported)
+
+    def test_unknown_aggregates_are_rejected(self):
+        zone_maps = {col: [] for col in ZONE_MAP_COLS}
+        for name in ('p101', 'p-1', 'px', 'p', 'median'):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                QueryProcessor(
+                    zone_maps=zone_maps,
+                    start='2003-01-01',
+                    end='2004-01-01',
+                    stations=['Changi'],
+                    aggregates=['min', name],
+                    station_codes=MAPPER['Station']
+                )
@@ -0,0 +1,122 @@
+from unittest import TestCase
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import copy  # noqa: E402
+import pandas as pd  # noqa: E402
+from pandas.testing import assert_frame_equal  # noqa: E402
+from convert_dataframe import read_data, scan_result  # noqa: E402
+from column_cache import COLUMN_CACHE  # noqa: E402
+from generate_data import generate_data  # noqa: E402
+from ingest import split_columns  # noqa: E402
+from monthly_summary import build_summary  # noqa: E402
+from Processor import Processor, RESULT_COLUMNS  # noqa: E402
+from project_config import (  # noqa: E402
+    MAPPER,
+    QUERY_MEMORY_BUDGET,
+    ZONE_MAP_COLS
+)
+
+# rows of the generated data file, raised with ORACLE_ROWS to check at scale
+ORACLE_ROWS = int(os.environ.get('ORACLE_ROWS', 10**6))
+STATIONS = ['Changi', 'Paya Lebar', 'Tuas']
+# (layout, partition, ingest workers) of each split checked
+SPLITS = [
+    ('arrival', 'rows', 1),
+    ('arrival', 'month', 2),
+    ('station', 'rows', 1),
+    ('station', 'year', 1)
+]
+# memory budget of the scan that spills its row ids to disk at once
+SPILL_BUDGET = 1
+# query workers of the scan fanned out to a process pool
+POOL_WORKERS = 2
+
+
+class TestScanOracle(TestCase):
+    """
+    Answers every year digit and station with the engine, on each layout,
+    partitioning and query path, serial or fanned out to a process pool, and
+    checks it against the pandas oracle
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.cwd = os.getcwd()
+        os.chdir(cls.folder.name)
+        cls.data_file = os.path.abspath('data.csv')
+        generate_data(data_file=cls.data_file, rows=ORACLE_ROWS, stations=STATIONS)
+        df = read_data(cls.data_file)
+        cls.expected = {
+            (required_years, station): scan_result(
+                df=df,
+                required_years=required_years,
+                station=station
+            )
+            for required_years in range(10)
+            for station in STATIONS
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        cls.folder.cleanup()
+
+    def test_engine_matches_oracle(self):
+        for layout, partition, workers in SPLITS:
+            COLUMN_CACHE.clear()
+            dictionaries = copy.deepcopy(MAPPER)
+            with contextlib.redirect_stdout(io.StringIO()):
+                zone_maps = split_columns(
+                    data_file=self.data_file,
+                    zone_maps={col: [] for col in ZONE_MAP_COLS},
+                    dictionaries=dictionaries,
+                    workers=workers,
+                    layout=layout,
+                    partition=partition
+                )
+            summary = build_summary(zone_maps=zone_maps)
+            for path in ('scan', 'spill', 'pool', 'summary'):
+                with self.subTest(layout=layout, partition=partition, path=path):
+                    self.check_queries(
+                        zone_maps=zone_maps,
+                        stations=dictionaries['Station'],
+                        path=path,
+                        summary=summary
+                    )
+
+    def check_queries(self, zone_maps, stations, path, summary):
+        processor = Processor(
+            required_years=None,
+            location=None,
+            zone_maps=zone_maps,
+            workers=POOL_WORKERS if path == 'pool' else 1,
+            memory_budget=SPILL_BUDGET if path == 'spill' else QUERY_MEMORY_BUDGET,
+            stations=stations,
+            queries=[
+                (required_years, stations[station])
+                for required_years, station in self.expected
+            ]
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            processor.process_month_and_year()
+            if path == 'summary':
+                processor.summarize_months(summary=summary)
+            else:
+                processor.process_location()
+                processor.aggregate_months()
+        for (required_years, station), expected in self.expected.items():
+            actual = pd.DataFrame(
+                processor.query_rows(
+                    required_years=required_years,
+                    location=stations[station]
+                ),
+                columns=RESULT_COLUMNS
+            ).astype({'Value': float})
+            actual = actual.sort_values(['Date', 'Category'], ignore_index=True)
+            assert_frame_equal(actual, expected, check_dtype=False)
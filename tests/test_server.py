@@ -0,0 +1,55 @@
+from unittest import TestCase, mock
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from server import QueryServer  # noqa: E402
+
+
+class BufferWriter:
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        return
+
+
+class TestQueryServer(TestCase):
+    def setUp(self):
+        catalog = {'zone_maps': {}, 'dictionaries': {'Station': {'Changi': '0'}}}
+        self.server = QueryServer(catalog=catalog, workers=1)
+        self.addCleanup(self.server.executor.shutdown)
+
+    def streamed_lines(self, rows):
+        writer = BufferWriter()
+        with mock.patch('server.STREAM_BATCH_ROWS', 2):
+            asyncio.run(self.server.stream_rows(writer=writer, header=['a'], rows=rows))
+        return writer.data.decode().split('\r\n\r\n', 1)[1].splitlines()
+
+    def test_stream_rows_sends_every_row_once(self):
+        rows = [[i] for i in range(5)]
+        self.assertEqual(self.streamed_lines(rows), ['a', '0', '1', '2', '3', '4'])
+        self.assertEqual(self.streamed_lines([]), ['a'])
+
+    def test_scan_rows_rejects_unknown_stations(self):
+        with self.assertRaises(ValueError):
+            self.server.scan_rows({'years': '4', 'station': 'Nowhere'})
+        with self.assertRaises(ValueError):
+            self.server.scan_rows({'years': '42', 'station': 'Changi'})
+
+    def test_handle_reports_unexpected_errors(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'GET /scan?years=4&station=Changi HTTP/1.1\r\n\r\n')
+        reader.feed_eof()
+        writer = mock.Mock(data=b'')
+        writer.write = lambda data: setattr(writer, 'data', writer.data + data)
+        writer.drain = writer.wait_closed = mock.AsyncMock()
+        with mock.patch.object(self.server, 'scan_rows', side_effect=OSError('gone')):
+            asyncio.run(self.server.handle(reader=reader, writer=writer))
+        self.assertTrue(writer.data.startswith(b'HTTP/1.1 500 Internal Server Error'))
+        self.assertTrue(writer.data.endswith(b'gone\n'))
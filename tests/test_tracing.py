@@ -0,0 +1,49 @@
+from unittest import TestCase
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tracing import NO_SPAN, Tracer, format_report  # noqa: E402
+
+
+class TestTracer(TestCase):
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        self.assertIs(tracer.span('query'), NO_SPAN)
+        traced = tracer.traced('stage')(lambda value: value + 1)
+        with tracer.span('query'):
+            tracer.count(rows_in=1)
+            self.assertEqual(traced(1), 2)
+        self.assertEqual(len(tracer.spans), 0)
+
+    def test_stages_roll_up_into_their_query(self):
+        tracer = Tracer(enabled=True)
+
+        @tracer.traced('stage')
+        def stage(rows):
+            tracer.count(rows_in=rows, bytes_read=10)
+            return rows
+
+        with tracer.span('query', matric_num='u2022913c') as span:
+            stage(rows=3)
+            stage(rows=4)
+        report = span.report()
+        self.assertEqual(report['matric_num'], 'u2022913c')
+        self.assertEqual(report['bytes_read'], 20)
+        self.assertNotIn('rows_in', report)
+        self.assertEqual([s['rows_in'] for s in report['stages']], [3, 4])
+        self.assertEqual(len(format_report(report=report)), 3)
+
+        with tempfile.TemporaryDirectory() as folder:
+            tracer.write_trace(trace_file=f'{folder}/trace.json')
+            with open(f'{folder}/trace.json', 'r') as f:
+                trace = json.load(f)
+        events = trace['traceEvents']
+        names = [event['name'] for event in events]
+        self.assertEqual(names, ['query', 'stage', 'stage'])
+        self.assertTrue(all(event['ph'] == 'X' for event in events))
+        self.assertGreaterEqual(events[1]['ts'], events[0]['ts'])
+        self.assertEqual(trace['reports'], [report])
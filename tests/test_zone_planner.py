@@ -0,0 +1,45 @@
+from unittest import TestCase
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from zone_planner import ZonePlanner, partition_key  # noqa: E402
+
+
+def plan(planner, keys):
+    sizes = []
+    for key in keys:
+        sizes.extend(planner.add(key=key))
+    return sizes + planner.finish()
+
+
+class TestZonePlanner(TestCase):
+    def test_partition_key(self):
+        self.assertIsNone(partition_key('2003-02-01 10:30', 'rows'))
+        self.assertEqual(partition_key('2003-02-01 10:30', 'year'), '2003')
+        self.assertEqual(partition_key('2003-02-01 10:30', 'month'), '2003-02')
+
+    def test_rows_are_cut_every_limit(self):
+        planner = ZonePlanner(limit=4, whole=False)
+        self.assertEqual(plan(planner, [None] * 10), [4, 4, 2])
+
+    def test_partitions_share_a_zone_while_they_fit(self):
+        keys = ['01'] * 2 + ['02'] * 2 + ['03'] * 3 + ['04']
+        planner = ZonePlanner(limit=5, whole=True)
+        self.assertEqual(plan(planner, keys), [4, 4])
+
+    def test_large_partition_gets_zones_of_its_own(self):
+        keys = ['01'] * 2 + ['02'] * 7 + ['03']
+        planner = ZonePlanner(limit=3, whole=True)
+        self.assertEqual(plan(planner, keys), [2, 3, 3, 2])
+
+    def test_counts_plan_like_single_rows(self):
+        keys = ['01'] * 2 + ['02'] * 7 + ['03'] * 4
+        planner = ZonePlanner(limit=3, whole=True)
+        sizes = planner.add('01', 2) + planner.add('02', 7) + planner.add('03', 4)
+        self.assertEqual(sizes + planner.finish(), plan(ZonePlanner(3, True), keys))
+
+    def test_held_rows_continue_the_last_zone(self):
+        planner = ZonePlanner(limit=5, whole=True, held=2, key='01')
+        self.assertEqual(plan(planner, ['01', '02', '02', '02']), [3, 3])